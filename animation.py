@@ -0,0 +1,87 @@
+# Time-based animations for the game screens.
+#
+# An animation moves a value from start to end over a duration in
+# milliseconds, shaped by an easing function. A screen advances its
+# animations by the milliseconds the previous frame took (what
+# FrameScheduler.tick() returns), so an animation lasts as long at 30 FPS
+# as uncapped, on a fast machine as under load; a slow frame makes it jump
+# ahead instead of running longer.
+#
+# Every animation may name the screen area it draws into; update() returns
+# the areas that changed so the screen can invalidate exactly those.
+
+
+# Easing functions: progress 0..1 in, eased progress 0..1 out
+def linear(t):
+    return t
+
+
+def ease_in_quad(t):
+    # Accelerating, like a falling piece
+    return t * t
+
+
+def ease_out_cubic(t):
+    # Fast start, gentle stop
+    return 1 - (1 - t) ** 3
+
+
+class Animation:
+    def __init__(self, start, end, duration, easing=linear, rect=None, on_done=None):
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.easing = easing
+        self.rect = rect        # Screen area to redraw while running, None for the whole screen
+        self.on_done = on_done  # Called once the end value is reached
+        self.elapsed = 0.0
+
+    @property
+    def done(self):
+        return self.elapsed >= self.duration
+
+    @property
+    def progress(self):
+        if self.duration <= 0:
+            return 1.0
+        return min(self.elapsed / self.duration, 1.0)
+
+    @property
+    def value(self):
+        return self.start + (self.end - self.start) * self.easing(self.progress)
+
+
+class Animator:
+    # Running animations of a screen, by name
+    def __init__(self):
+        self.animations = {}
+
+    def start(self, name, start, end, duration, easing=linear, rect=None, on_done=None):
+        # Start an animation, replacing a running one of the same name
+        self.animations[name] = Animation(start, end, duration, easing, rect, on_done)
+
+    def cancel(self, name=None):
+        # Drop one animation, or all of them, without calling on_done
+        if name is None:
+            self.animations.clear()
+        else:
+            self.animations.pop(name, None)
+
+    def value(self, name, default=None):
+        # Current value of the animation, or default if it is not running
+        animation = self.animations.get(name)
+        return default if animation is None else animation.value
+
+    def update(self, elapsed_ms):
+        # Advance every animation; returns the screen areas to redraw.
+        # Finished animations are removed before on_done runs, so it can
+        # start a new one under the same name.
+        rects = []
+        for name, animation in list(self.animations.items()):
+            animation.elapsed += elapsed_ms
+            rects.append(animation.rect)
+            if animation.done:
+                del self.animations[name]
+                if animation.on_done:
+                    animation.on_done()
+        return rects
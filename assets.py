@@ -0,0 +1,79 @@
+import os
+import threading
+
+import pygame
+
+# Sounds and music, loaded off the main thread.
+#
+# Opening the audio device and decoding the sounds take longer than drawing
+# the first menu frame, so init_game() only starts load_audio() and the
+# menu shows right away. Until the audio is ready, and for good if there is
+# no audio device or the files are missing, sounds are silent; volume
+# changes made meanwhile are applied once it is ready.
+
+CLICK_PATH = "src/click.mp3"
+MUSIC_PATH = "src/background_music.mp3"
+
+_lock = threading.Lock()
+_music_ready = False
+_music_volume = 1.0
+
+
+class LazySound:
+    # Stands in for a pygame Sound, silent until the sound is loaded
+    def __init__(self):
+        self.sound = None
+        self.volume = 1.0
+
+    def set_volume(self, volume):
+        with _lock:
+            self.volume = volume
+            if self.sound:
+                self.sound.set_volume(volume)
+
+    def play(self):
+        if self.sound:
+            self.sound.play()
+
+    def loaded(self, sound):
+        with _lock:
+            sound.set_volume(self.volume)
+            self.sound = sound
+
+
+click_sound = LazySound()
+
+
+def set_music_volume(volume):
+    global _music_volume
+    with _lock:
+        _music_volume = volume
+        if _music_ready:
+            pygame.mixer.music.set_volume(volume)
+
+
+def _load_audio():
+    global _music_ready
+    try:
+        pygame.mixer.init()
+        click_sound.loaded(pygame.mixer.Sound(CLICK_PATH))
+    except (pygame.error, OSError):
+        return  # No audio device or no sound file, play without sound
+
+    if not os.path.exists(MUSIC_PATH):
+        return
+    try:
+        pygame.mixer.music.load(MUSIC_PATH)
+        with _lock:
+            pygame.mixer.music.set_volume(_music_volume)
+            pygame.mixer.music.play(-1)  # Play indefinitely
+            _music_ready = True
+    except pygame.error:
+        pass
+
+
+def load_audio(game_volume, music_volume):
+    # Start loading the click sound and the background music
+    click_sound.set_volume(game_volume)
+    set_music_volume(music_volume)
+    threading.Thread(target=_load_audio, name="audio loader", daemon=True).start()
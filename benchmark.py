@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import bots
+import engine
+import tournament
+from bitboard import WINNING, full_window
+from engine import find_line_through
+
+# Benchmarks of the engine and the bots, with JSON baselines:
+#
+#   python -m benchmark run -o baseline.json
+#   python -m benchmark compare baseline.json [current.json] --threshold 0.1
+#   python -m benchmark startup
+#
+# Every result is either a latency (p50/p99 in microseconds, lower is
+# better) or a throughput (games per second, higher is better). compare
+# runs the suite again unless a second file is given and exits with
+# status 1 if any result got slower than the threshold allows.
+#
+# The startup result is the time from launching main.py to its first menu
+# frame. It runs without a window unless SDL_VIDEODRIVER says otherwise.
+
+DEFAULT_THRESHOLD = 0.1
+POSITIONS = 500
+STARTUP_RUNS = 10
+
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def sample_positions(mode, count, rng):
+    # Positions from random games, game over positions included
+    positions = []
+    while len(positions) < count:
+        state = engine.new_game(mode)
+        while not state.game_over and len(positions) < count:
+            positions.append(state.copy())
+            state.apply_move(rng.choice(state.legal_moves()))
+        positions.append(state)
+    return positions[:count]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 3),
+        "p99_us": round(samples[min(len(samples) - 1, len(samples) * 99 // 100)] * 1e6, 3),
+    }
+
+
+def time_batches(function, positions, batches=50, batch_seconds=0.005):
+    # Mean time per call of batches of passes over the positions; a single
+    # pass is too short to time reliably, so a batch repeats it until it
+    # lasts about batch_seconds
+    def run_pass():
+        start = time.perf_counter()
+        for state in positions:
+            function(state)
+        return time.perf_counter() - start
+
+    passes = max(1, int(batch_seconds / max(run_pass(), 1e-9)))
+    samples = []
+    for _ in range(batches):
+        start = time.perf_counter()
+        for _ in range(passes):
+            for state in positions:
+                function(state)
+        samples.append((time.perf_counter() - start) / (passes * len(positions)))
+    return percentiles(samples)
+
+
+def time_calls(function, positions):
+    # Time of every single call
+    samples = []
+    for state in positions:
+        start = time.perf_counter()
+        function(state)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def time_startup(runs=STARTUP_RUNS):
+    # Time from starting the game process to its first menu frame, one fresh process per run
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        game = subprocess.Popen([sys.executable, "main.py", "--first-frame"], cwd=GAME_DIR, env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        # Lines before the marker are pygame's greeting; an empty line means the game exited
+        line = game.stdout.readline()
+        while line and line.strip() != "first frame":
+            line = game.stdout.readline()
+        samples.append(time.perf_counter() - start)
+        game.wait()
+        if not line:
+            raise RuntimeError("main.py exited before drawing its first frame")
+    return percentiles(samples)
+
+
+# Win checks of every mode, as done after each move
+WIN_CHECKS = {
+    # Lines through the center, the worst case with four lines to check
+    "classic": lambda state: full_window(state.x_bits, state.windows[4]) or full_window(state.o_bits, state.windows[4]),
+    "3moves": lambda state: find_line_through(state.cells, 4, engine.X) or find_line_through(state.cells, 4, engine.O),
+    "tetris": lambda state: full_window(state.x_bits, state.windows[4]) or full_window(state.o_bits, state.windows[4]),
+    # Scales with k, not with the board: only the runs through one cell are tested
+    "gomoku": lambda state: full_window(state.x_bits, state.windows[112]) or full_window(state.o_bits, state.windows[112]),
+    "connect4": lambda state: full_window(state.x_bits, state.windows[24]) or full_window(state.o_bits, state.windows[24]),
+    "ultimate_small": lambda state: [WINNING[state.board_bits(board, engine.X)] for board in range(9)],
+    "ultimate_big": lambda state: WINNING[state.x_big] or WINNING[state.o_big],
+}
+
+
+def run_suite(think_ms=50, games=2000, seed=1):
+    rng = random.Random(seed)
+    random.seed(seed)
+    positions = {mode: sample_positions(mode, POSITIONS, rng) for mode in engine.MODES}
+    results = {"startup.first_frame": time_startup()}
+
+    for name, check in WIN_CHECKS.items():
+        results[f"win_check.{name}"] = time_batches(check, positions[name.split("_")[0]])
+
+    for mode in engine.MODES:
+        results[f"legal_moves.{mode}"] = time_batches(lambda state: state.legal_moves(), positions[mode])
+
+    for mode, tiers in bots.BOTS.items():
+        playing = [state for state in positions[mode] if not state.game_over]
+        for tier, bot in tiers.items():
+            # Search bots take think_ms per move, a few calls are enough for them
+            calls = playing[:20] if isinstance(bot, type) else playing
+            results[f"bot.{mode}.{tier}"] = time_calls(bots.get_bot(mode, tier, think_ms), calls)
+
+    for mode in engine.MODES:
+        # A Gomoku game is a hundred moves on 225 cells, a few games per second
+        count = games // 20 if mode == "gomoku" else games
+        start = time.perf_counter()
+        tournament.run_tournament(mode, "Easy", "Easy", count, seed=seed)
+        results[f"games.{mode}"] = {"games_per_s": round(count / (time.perf_counter() - start), 1)}
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    # Print every result next to its baseline; return the names that regressed
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:28} new")
+            continue
+        if "games_per_s" in result:
+            # Throughput: a lower number is a slowdown
+            change = base["games_per_s"] / result["games_per_s"] - 1
+            values = f"{base['games_per_s']:>12.1f} -> {result['games_per_s']:>12.1f} games/s"
+        else:
+            change = result["p50_us"] / base["p50_us"] - 1 if base["p50_us"] else 0.0
+            values = f"{base['p50_us']:>12.3f} -> {result['p50_us']:>12.3f} us p50"
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        print(f"{name:28} {values} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Benchmark the engine and the bots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and print or save the results")
+    run_parser.add_argument("-o", "--output", help="JSON file to save the results to")
+    compare_parser = commands.add_parser("compare", help="compare results with a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="?", help="saved results to compare (default: run the suite now)")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, 0.1 = 10%%")
+    for command in (run_parser, compare_parser):
+        command.add_argument("--think-ms", type=int, default=50, help="time per move of search bots")
+        command.add_argument("--games", type=int, default=2000, help="games per mode for the throughput test")
+    startup_parser = commands.add_parser("startup", help="time from launching the game to its first frame")
+    startup_parser.add_argument("--runs", type=int, default=STARTUP_RUNS, help="game launches to time")
+    args = parser.parse_args(argv)
+
+    if args.command == "startup":
+        result = time_startup(args.runs)
+        print(f"first frame: {result['p50_us'] / 1000:.1f} ms p50, {result['p99_us'] / 1000:.1f} ms p99 ({args.runs} runs)")
+        return 0
+
+    if args.command == "run":
+        report = run_suite(args.think_ms, args.games)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text)
+        print(text)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = run_suite(args.think_ms, args.games)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# Bitboard helpers for 3x3 boards.
+#
+# A board is a 9-bit mask per player with bit (row * 3 + col) set for every
+# cell the player owns. All the tables below are indexed by such a mask, so
+# win detection and move generation are a lookup instead of a scan.
+#
+# Larger boards (width x height, k in a row) use the same layout with bit
+# (row * width + col) in a Python int of any length; see window_masks().
+
+import functools
+
+FULL = 0x1FF
+
+# The 8 winning lines as masks: rows, columns, diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Cell indices of the set bits of every mask
+BITS = tuple(tuple(i for i in range(9) if mask >> i & 1) for mask in range(512))
+
+# Number of set bits of every mask
+POPCOUNT = bytes(len(cells) for cells in BITS)
+
+# 1 if the mask contains a full line
+WINNING = bytes(any(mask & line == line for line in WIN_MASKS) for mask in range(512))
+
+
+# Winning lines through every cell; a move can only complete one of these
+LINES_THROUGH = tuple(tuple(line for line in WIN_MASKS if line >> cell & 1) for cell in range(9))
+
+
+def win_line_through(mask, cell):
+    # Cells of a full line through the cell, or None
+    for line in LINES_THROUGH[cell]:
+        if mask & line == line:
+            return BITS[line]
+    return None
+
+
+def threats(mine, theirs):
+    # Empty cells that complete a line for the owner of `mine`
+    empty = FULL & ~(mine | theirs)
+    cells = 0
+    for line in WIN_MASKS:
+        if POPCOUNT[mine & line] == 2 and line & empty:
+            cells |= line & empty
+    return cells
+
+
+# The 8 symmetries of the square as cell permutations: cell i moves to SYMMETRIES[s][i]
+def _rotate(cell):
+    row, col = divmod(cell, 3)
+    return col * 3 + (2 - row)
+
+
+def _mirror(cell):
+    row, col = divmod(cell, 3)
+    return row * 3 + (2 - col)
+
+
+SYMMETRIES = []
+for _flip in (False, True):
+    _perm = [_mirror(i) if _flip else i for i in range(9)]
+    for _turn in range(4):
+        SYMMETRIES.append(tuple(_perm))
+        _perm = [_rotate(cell) for cell in _perm]
+
+# Every mask transformed by every symmetry
+SYM_TABLES = tuple(
+    tuple(sum(1 << perm[i] for i in BITS[mask]) for mask in range(512))
+    for perm in SYMMETRIES
+)
+
+# Symmetry that undoes each symmetry
+INVERSE = tuple(
+    next(t for t in range(8) if all(SYMMETRIES[t][SYMMETRIES[s][i]] == i for i in range(9)))
+    for s in range(8)
+)
+
+
+def canonical(mine, theirs):
+    # Smallest key of the position over all symmetries and the symmetry reaching it
+    best_key = None
+    best_sym = 0
+    for sym, table in enumerate(SYM_TABLES):
+        key = table[mine] | table[theirs] << 9
+        if best_key is None or key < best_key:
+            best_key = key
+            best_sym = sym
+    return best_key, best_sym
+
+
+# Base-3 index of every mask (bit i counts 3 ** i); a position's index is
+# TERNARY[x] + 2 * TERNARY[o], a dense number below 3 ** 9
+TERNARY = tuple(sum(3 ** i for i in BITS[mask]) for mask in range(512))
+
+
+def bit_indices(mask):
+    # Cell indices of the set bits of a mask of any length, 9 bits at a time
+    if mask <= FULL:
+        return list(BITS[mask])
+    cells = []
+    base = 0
+    while mask:
+        cells.extend(base + i for i in BITS[mask & FULL])
+        mask >>= 9
+        base += 9
+    return cells
+
+
+@functools.lru_cache(maxsize=None)
+def window_masks(width, height, k):
+    # Every run of k cells in a row, column or diagonal through each cell of
+    # a width x height board, as masks. A move can only complete one of the
+    # runs through its cell, so a win check tests at most 4 * k masks
+    # whatever the size of the board.
+    if (width, height, k) == (3, 3, 3):
+        return LINES_THROUGH
+    windows = [[] for _ in range(width * height)]
+    for row in range(height):
+        for col in range(width):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = row + d_row * (k - 1)
+                end_col = col + d_col * (k - 1)
+                if end_row < height and 0 <= end_col < width:
+                    cells = [(row + d_row * i) * width + col + d_col * i for i in range(k)]
+                    mask = sum(1 << cell for cell in cells)
+                    for cell in cells:
+                        windows[cell].append(mask)
+    return tuple(tuple(masks) for masks in windows)
+
+
+def full_window(mask, windows):
+    # Cells of the first of the windows fully taken in the mask, or None
+    for window in windows:
+        if mask & window == window:
+            return tuple(bit_indices(window))
+    return None
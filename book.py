@@ -0,0 +1,89 @@
+import mmap
+import os
+import random
+import struct
+
+from bitboard import BITS, INVERSE, SYM_TABLES, TERNARY, canonical
+
+# Opening/endgame book for Classic mode.
+#
+# The file holds one entry for every canonical position (smallest under the
+# 8 board symmetries), built once by build_tables.py. Entries are indexed
+# directly by the base-3 index of the canonical position, so a lookup is a
+# canonicalization and a single read from the memory-mapped file.
+#
+# Layout: header (magic, version, number of stored positions), then a
+# little-endian uint16 for each of the 3 ** 9 indices:
+#   bit 15     - entry is stored
+#   bits 9-13  - negamax value for the side to move, offset by 10
+#   bits 0-8   - mask of the best moves
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "classic_book.bin")
+MAGIC = b"TTTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+ENTRY = struct.Struct("<H")
+SIZE = 3 ** 9
+
+_book = None
+
+
+def encode_entry(value, best_moves):
+    return 0x8000 | (value + 10) << 9 | best_moves
+
+
+def decode_entry(entry):
+    # (value, best move mask) of a stored entry, or None
+    if not entry & 0x8000:
+        return None
+    return (entry >> 9 & 0x1F) - 10, entry & 0x1FF
+
+
+def write_book(path, entries):
+    # entries: {index: (value, best move mask)} of canonical positions
+    data = bytearray(HEADER.size + SIZE * ENTRY.size)
+    HEADER.pack_into(data, 0, MAGIC, VERSION, len(entries))
+    for index, (value, best_moves) in entries.items():
+        ENTRY.pack_into(data, HEADER.size + index * ENTRY.size, encode_entry(value, best_moves))
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def load_book(path=BOOK_PATH):
+    # Memory-map the book once; returns None if it was never built
+    global _book
+    if _book is None:
+        try:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        # Check the size first, a truncated file is too short for the header
+        if len(data) != HEADER.size + SIZE * ENTRY.size or HEADER.unpack_from(data, 0)[:2] != (MAGIC, VERSION):
+            data.close()
+            return None
+        _book = data
+    return _book
+
+
+def lookup(x_bits, o_bits):
+    # (value, best move mask) of a position in its own orientation, or None
+    book = load_book()
+    if book is None:
+        return None
+    sym = canonical(x_bits, o_bits)[1]
+    table = SYM_TABLES[sym]
+    index = TERNARY[table[x_bits]] + 2 * TERNARY[table[o_bits]]
+    entry = decode_entry(ENTRY.unpack_from(book, HEADER.size + index * ENTRY.size)[0])
+    if entry is None:
+        return None
+    value, best_moves = entry
+    return value, SYM_TABLES[INVERSE[sym]][best_moves]
+
+
+def book_move(state):
+    # Random best move from the book, or None if the position is not in it
+    entry = lookup(state.x_bits, state.o_bits)
+    if entry is None or not entry[1]:
+        return None
+    return random.choice(BITS[entry[1]])
@@ -0,0 +1,226 @@
+import random
+
+import book
+import mcts
+import position_index
+import tetris_table
+import three_moves_table
+from bitboard import BITS, FULL, POPCOUNT, WINNING, canonical, threats
+
+# Bots for every mode. A bot takes an engine state and returns a move
+# for the side to move, without changing the state.
+
+
+# Classic: take a winning move, else block the opponent, else play randomly
+def classic_bot_move(state):
+    mine = state.bits(state.player)
+    theirs = state.bits(-state.player)
+    for cells in [threats(mine, theirs), threats(theirs, mine)]:
+        if cells:
+            return BITS[cells][0]
+
+    return random.choice(state.legal_moves())
+
+
+# Classic, perfect play: negamax with alpha-beta over bitboards.
+# Values are from the side to move's point of view; faster wins score higher.
+# The transposition table is keyed by the canonical position and kept for
+# the whole session, so after the first game every reply is a lookup.
+EXACT, LOWER, UPPER = 0, 1, 2
+classic_table = {}
+
+
+def classic_negamax(mine, theirs, alpha, beta):
+    empty = FULL & ~(mine | theirs)
+    if WINNING[theirs]:
+        return -1 - POPCOUNT[empty]
+    if not empty:
+        return 0
+
+    key = canonical(mine, theirs)[0]
+    entry = classic_table.get(key)
+    if entry:
+        value, flag = entry
+        if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+            return value
+
+    alpha_start = alpha
+    best = -10
+    for i in BITS[empty]:
+        value = -classic_negamax(theirs, mine | 1 << i, -beta, -alpha)
+        if value > best:
+            best = value
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    break
+
+    if best <= alpha_start:
+        flag = UPPER
+    elif best >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    classic_table[key] = (best, flag)
+    return best
+
+
+def classic_move_values(state):
+    # Exact value of every legal move for the side to move
+    mine = state.bits(state.player)
+    theirs = state.bits(-state.player)
+    return {move: -classic_negamax(theirs, mine | 1 << move, -10, 10) for move in state.legal_moves()}
+
+
+def classic_perfect_move(state):
+    # The shipped book answers without any search; solve only if it is missing
+    move = book.book_move(state)
+    if move is not None:
+        return move
+    values = classic_move_values(state)
+    best = max(values.values())
+    return random.choice([move for move, value in values.items() if value == best])
+
+
+# 3-Tac: same idea, but the oldest mark disappears when a fourth is placed
+def three_moves_bot_move(state):
+    # Try to find a winning move for the bot or block the opponent's winning move
+    moves = state.legal_moves()
+    for marker in [state.player, -state.player]:
+        for move in moves:
+            if state.completes_line(move, marker):
+                return move
+
+    return random.choice(moves)
+
+
+# 3-Tac, perfect play: the retrograde table knows the result of every position
+def three_moves_perfect_move(state):
+    return three_moves_table.best_move(state)
+
+
+# Tetris-like and Connect Four: win or block a column, else prefer the center column
+def tetris_bot_move(state):
+    columns = state.legal_moves()
+    for marker in [state.player, -state.player]:
+        for col in columns:
+            if state.completes_line(col, marker):
+                return col
+
+    if state.width // 2 in columns:
+        return state.width // 2
+    return random.choice(columns)
+
+
+# Tetris-like, perfect play: the whole game tree is solved into a table
+def tetris_perfect_move(state):
+    return tetris_table.best_move(state)
+
+
+# Gomoku: win or block, else play next to a mark already on the board
+def gomoku_bot_move(state):
+    moves = state.legal_moves()
+    for marker in [state.player, -state.player]:
+        for move in moves:
+            if state.completes_line(move, marker):
+                return move
+
+    taken = state.x_bits | state.o_bits
+    if not taken:
+        return (state.height // 2) * state.width + state.width // 2
+
+    def next_to_mark(move):
+        row, col = divmod(move, state.width)
+        for r in range(max(row - 1, 0), min(row + 2, state.height)):
+            for c in range(max(col - 1, 0), min(col + 2, state.width)):
+                if taken >> (r * state.width + c) & 1:
+                    return True
+        return False
+
+    return random.choice([move for move in moves if next_to_mark(move)])
+
+
+# Ultimate: win or block the active small board, else prefer corners and edges
+def ultimate_bot_move(state):
+    player = state.player
+    open_boards = state.open_boards()
+
+    def small_threats(board, marker):
+        # Cells of the board that complete a line for the marker
+        return threats(state.board_bits(board, marker), state.board_bits(board, -marker))
+
+    if len(open_boards) == 1:
+        board = open_boards[0]
+        for marker in [player, -player]:
+            cells = small_threats(board, marker)
+            if cells:
+                return board * 9 + BITS[cells][0]
+
+        # Prefer corners and edges that don't send the opponent to a board it can win
+        preferred_cells = [0, 2, 6, 8, 1, 3, 5, 7]
+        random.shuffle(preferred_cells)
+        empty = set(move - board * 9 for move in state.legal_moves())
+        for i in preferred_cells:
+            if i in empty and state.big_cell(i) == 0 and not small_threats(i, -player):
+                return board * 9 + i
+
+        for i in preferred_cells + [4]:
+            if i in empty:
+                return board * 9 + i
+
+    # Free choice of board: take the first available cell
+    return state.legal_moves()[0]
+
+
+# Bot tiers from weakest to strongest
+DIFFICULTIES = ["Easy", "Hard", "Perfect"]
+
+# A tier is either a function or a class; classes are instantiated per game
+# session so they can keep state between turns
+BOTS = {
+    "classic": {"Easy": classic_bot_move, "Perfect": classic_perfect_move},
+    "3moves": {"Easy": three_moves_bot_move, "Perfect": three_moves_perfect_move},
+    "tetris": {"Easy": tetris_bot_move, "Perfect": tetris_perfect_move},
+    "ultimate": {"Easy": ultimate_bot_move, "Hard": mcts.MCTSBot},
+    "gomoku": {"Easy": gomoku_bot_move},
+    "connect4": {"Easy": tetris_bot_move},
+}
+
+
+# Modes whose bots below Perfect play from the player's game-log index
+BOOK_MODES = ("classic", "ultimate")
+
+
+class BookBot:
+    # Plays the move that did best in the logged games while the position
+    # was reached often enough, the wrapped bot's move after that
+    def __init__(self, bot, index):
+        self.bot = bot
+        self.index = index
+
+    def stop(self):
+        if hasattr(self.bot, "stop"):
+            self.bot.stop()
+
+    def __call__(self, state):
+        move = position_index.book_move(state, self.index)
+        if move is None:
+            return self.bot(state)
+        return move
+
+
+def get_bot(mode, difficulty, think_ms=mcts.DEFAULT_THINK_MS, workers=1, book=False):
+    # Strongest tier of the mode that does not exceed the requested difficulty
+    tiers = BOTS[mode]
+    bot = tiers["Easy"]
+    for name in reversed(DIFFICULTIES[:DIFFICULTIES.index(difficulty) + 1]):
+        if name in tiers:
+            bot = tiers[name]
+            break
+    if isinstance(bot, type):
+        bot = bot(think_ms, workers)
+    if book and mode in BOOK_MODES and bot is not tiers.get("Perfect"):
+        index = position_index.load_index(mode)
+        if index is not None:
+            return BookBot(bot, index)
+    return bot
@@ -0,0 +1,60 @@
+import book
+import bots
+import engine
+import solved_tables
+import tetris_table
+import three_moves_table
+from bitboard import SYM_TABLES, TERNARY, canonical
+
+# Build step for the precomputed tables shipped in src/.
+# Run `python build_tables.py` after changing the rules or the bots.
+
+
+def build_classic_book(path=book.BOOK_PATH):
+    entries = {}
+    pending = [engine.ClassicState()]
+    while pending:
+        state = pending.pop()
+        sym = canonical(state.x_bits, state.o_bits)[1]
+        table = SYM_TABLES[sym]
+        x_bits, o_bits = table[state.x_bits], table[state.o_bits]
+        index = TERNARY[x_bits] + 2 * TERNARY[o_bits]
+        if index in entries:
+            continue
+
+        if state.game_over:
+            value = 0 if state.winner == engine.TIE else -1 - len(state.legal_moves())
+            entries[index] = (value, 0)
+            continue
+
+        # Solve the canonical orientation so the stored move mask matches the index
+        canonical_state = state.copy()
+        canonical_state.x_bits, canonical_state.o_bits = x_bits, o_bits
+        values = bots.classic_move_values(canonical_state)
+        value = max(values.values())
+        entries[index] = (value, sum(1 << move for move, v in values.items() if v == value))
+
+        for move in state.legal_moves():
+            child = state.copy()
+            child.apply_move(move)
+            pending.append(child)
+
+    book.write_book(path, entries)
+    return len(entries)
+
+
+def build_three_moves_table(path=three_moves_table.TABLE_PATH):
+    return solved_tables.write_table(path, three_moves_table.MAGIC, three_moves_table.solve())
+
+
+def build_tetris_table(path=tetris_table.TABLE_PATH):
+    return solved_tables.write_table(path, tetris_table.MAGIC, tetris_table.solve())
+
+
+if __name__ == "__main__":
+    count = build_classic_book()
+    print(f"Classic book: {count} positions written to {book.BOOK_PATH}")
+    count = build_three_moves_table()
+    print(f"3-Tac table: {count} positions written to {three_moves_table.TABLE_PATH}")
+    count = build_tetris_table()
+    print(f"Tetris-like table: {count} positions written to {tetris_table.TABLE_PATH}")
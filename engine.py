@@ -0,0 +1,547 @@
+# Game rules for every mode, free of any pygame dependency.
+#
+# Every mode exposes a state class with the same interface:
+#   state.player         - marker of the side to move (X or O)
+#   state.winner         - 0 while playing, then X, O or TIE
+#   state.game_over      - True once the game has a result
+#   state.winner_line    - cells of the winning line, or None
+#   state.legal_moves()  - list of moves for the side to move
+#   state.apply_move(m)  - play a move and switch sides
+#   state.make_move(m)   - apply_move without the legality check
+#   state.unmake_move()  - take back the last move made, returns it
+#   state.copy()         - independent copy of the position
+#   state.key            - Zobrist key of the position, kept up to date by every move
+#   state.compute_key()  - the same key computed from scratch
+#
+# Cells of a board are indexed row * width + col, row * 3 + col on the
+# 3x3 boards. Classic and Tetris-like boards can have any size and line
+# length (m x n, k in a row). Wins are detected incrementally: after a move
+# only the lines through the played cell are checked, and a counter of
+# empty cells detects a full board.
+#
+# Every move is pushed on the state's undo stack (state.history) with what
+# it takes to undo it, so search can walk the tree on a single state and
+# the UI can take moves back. A copy starts with an empty undo stack.
+
+import functools
+
+from bitboard import BITS, FULL, WINNING, bit_indices, full_window, win_line_through, window_masks
+from zobrist import ACTIVE, CELLS, MAX_CELLS, SIDE, ULTIMATE_CELLS, queue_key
+
+X = 1
+O = -1
+TIE = 2
+
+# All winning lines of a 3x3 board as cell indices
+LINES = [
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),  # rows
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),  # columns
+    (0, 4, 8), (2, 4, 6),             # diagonals
+]
+
+
+# Winning lines through every cell
+CELL_LINES = [[line for line in LINES if cell in line] for cell in range(9)]
+
+# The other two cells of every line through each cell
+LINE_PAIRS = [[tuple(other for other in line if other != cell) for line in CELL_LINES[cell]] for cell in range(9)]
+
+
+def find_line_through(cells, cell, marker):
+    # Line through the cell fully taken by the marker, or None
+    for line in CELL_LINES[cell]:
+        if cells[line[0]] == marker and cells[line[1]] == marker and cells[line[2]] == marker:
+            return line
+    return None
+
+
+# Classic mode, stored as one bitboard per player. The board is 3x3 with
+# 3 in a row by default; any width x height with k in a row works the same
+# way, e.g. 15x15 with 5 in a row for Gomoku.
+class ClassicState:
+    def __init__(self, width=3, height=3, k=3):
+        if width * height > MAX_CELLS or k > max(width, height):
+            raise ValueError(f"Unsupported board: {width}x{height}, {k} in a row")
+        self.width = width
+        self.height = height
+        self.k = k
+        self.windows = window_masks(width, height, k)
+        self.full = (1 << width * height) - 1
+        self.x_bits = 0
+        self.o_bits = 0
+        self.empty = width * height
+        self.key = 0
+        self.player = X
+        self.winner = 0
+        self.winner_line = None
+        self.history = []
+
+    @property
+    def game_over(self):
+        return self.winner != 0
+
+    def cell(self, index):
+        if self.x_bits >> index & 1:
+            return X
+        if self.o_bits >> index & 1:
+            return O
+        return 0
+
+    def bits(self, marker):
+        return self.x_bits if marker == X else self.o_bits
+
+    def legal_moves(self):
+        if self.winner:
+            return []
+        empty = self.full & ~(self.x_bits | self.o_bits)
+        return list(BITS[empty]) if self.full == FULL else bit_indices(empty)
+
+    def completes_line(self, move, marker):
+        # True if a mark of the marker on the cell would complete a line
+        mine = self.bits(marker) | 1 << move
+        for window in self.windows[move]:
+            if mine & window == window:
+                return True
+        return False
+
+    def apply_move(self, move):
+        if self.winner or not 0 <= move < self.width * self.height or (self.x_bits | self.o_bits) >> move & 1:
+            raise ValueError(f"Illegal move: {move}")
+        self.make_move(move)
+
+    def make_move(self, move):
+        bit = 1 << move
+        if self.player == X:
+            self.x_bits |= bit
+            mine = self.x_bits
+        else:
+            self.o_bits |= bit
+            mine = self.o_bits
+        self.empty -= 1
+        self.key ^= CELLS[self.player][move] ^ SIDE
+        self.winner_line = full_window(mine, self.windows[move])
+        if self.winner_line:
+            self.winner = self.player
+        elif not self.empty:
+            self.winner = TIE
+        self.history.append(move)
+        self.player = -self.player
+
+    def unmake_move(self):
+        move = self.history.pop()
+        self.player = -self.player
+        if self.player == X:
+            self.x_bits &= ~(1 << move)
+        else:
+            self.o_bits &= ~(1 << move)
+        self.empty += 1
+        self.key ^= CELLS[self.player][move] ^ SIDE
+        self.winner = 0
+        self.winner_line = None
+        return move
+
+    def compute_key(self):
+        key = SIDE if self.player == O else 0
+        for cell in bit_indices(self.x_bits):
+            key ^= CELLS[X][cell]
+        for cell in bit_indices(self.o_bits):
+            key ^= CELLS[O][cell]
+        return key
+
+    def copy(self):
+        new = ClassicState.__new__(ClassicState)
+        new.width = self.width
+        new.height = self.height
+        new.k = self.k
+        new.windows = self.windows
+        new.full = self.full
+        new.x_bits = self.x_bits
+        new.o_bits = self.o_bits
+        new.empty = self.empty
+        new.key = self.key
+        new.player = self.player
+        new.winner = self.winner
+        new.winner_line = self.winner_line
+        new.history = []
+        return new
+
+
+# 3-Tac mode: only the last 3 moves of each player stay on the board
+class ThreeMovesState:
+    def __init__(self):
+        self.cells = [0] * 9
+        self.x_list = []
+        self.o_list = []
+        self.key = 0
+        self.player = X
+        self.winner = 0
+        self.winner_line = None
+        self.history = []
+
+    @property
+    def game_over(self):
+        return self.winner != 0
+
+    def cell(self, index):
+        return self.cells[index]
+
+    def queue(self, marker):
+        return self.x_list if marker == X else self.o_list
+
+    def expiring_cell(self, marker):
+        # Oldest mark that disappears with the player's next move
+        moves = self.queue(marker)
+        return moves[0] if len(moves) == 3 else None
+
+    def completes_line(self, move, marker):
+        # True if the marker playing move would complete a line once its oldest mark is gone
+        expiring = self.expiring_cell(marker)
+        cells = self.cells
+        for a, b in LINE_PAIRS[move]:
+            if cells[a] == marker and cells[b] == marker and expiring != a and expiring != b:
+                return True
+        return False
+
+    def legal_moves(self):
+        if self.winner:
+            return []
+        return [i for i in range(9) if self.cells[i] == 0]
+
+    def apply_move(self, move):
+        if self.winner or not 0 <= move < 9 or self.cells[move] != 0:
+            raise ValueError(f"Illegal move: {move}")
+        self.make_move(move)
+
+    def make_move(self, move):
+        moves = self.queue(self.player)
+        # Every mark of the queue ages, so the queue's key is replaced as a whole
+        self.key ^= queue_key(moves, self.player)
+        self.cells[move] = self.player
+        moves.append(move)
+        expired = None
+        if len(moves) == 4:
+            expired = moves.pop(0)
+            self.cells[expired] = 0
+        self.key ^= queue_key(moves, self.player) ^ SIDE
+        # Removing the oldest mark never completes a line, so only the new mark matters
+        self.winner_line = find_line_through(self.cells, move, self.player)
+        if self.winner_line:
+            self.winner = self.player
+        self.history.append((move, expired))
+        self.player = -self.player
+
+    def unmake_move(self):
+        move, expired = self.history.pop()
+        self.player = -self.player
+        moves = self.queue(self.player)
+        self.key ^= queue_key(moves, self.player) ^ SIDE
+        moves.pop()
+        self.cells[move] = 0
+        if expired is not None:
+            # The expired mark comes back as the oldest one
+            moves.insert(0, expired)
+            self.cells[expired] = self.player
+        self.key ^= queue_key(moves, self.player)
+        self.winner = 0
+        self.winner_line = None
+        return move
+
+    def compute_key(self):
+        key = SIDE if self.player == O else 0
+        return key ^ queue_key(self.x_list, X) ^ queue_key(self.o_list, O)
+
+    def copy(self):
+        new = ThreeMovesState.__new__(ThreeMovesState)
+        new.cells = self.cells[:]
+        new.x_list = self.x_list[:]
+        new.o_list = self.o_list[:]
+        new.key = self.key
+        new.player = self.player
+        new.winner = self.winner
+        new.winner_line = self.winner_line
+        new.history = []
+        return new
+
+
+# Tetris-like mode: marks fall to the lowest free cell of the chosen column,
+# a move is the column. Stored as bitboards like Classic, and like Classic
+# any width x height with k in a row works, e.g. 7x6 with 4 in a row for
+# Connect Four.
+class TetrisState:
+    def __init__(self, width=3, height=3, k=3):
+        if width * height > MAX_CELLS or k > max(width, height):
+            raise ValueError(f"Unsupported board: {width}x{height}, {k} in a row")
+        self.width = width
+        self.height = height
+        self.k = k
+        self.windows = window_masks(width, height, k)
+        self.x_bits = 0
+        self.o_bits = 0
+        self.tops = [height - 1] * width  # Row where the next mark of each column lands, -1 once full
+        self.empty = width * height
+        self.key = 0
+        self.player = X
+        self.winner = 0
+        self.winner_line = None
+        self.history = []
+
+    @property
+    def game_over(self):
+        return self.winner != 0
+
+    def cell(self, index):
+        if self.x_bits >> index & 1:
+            return X
+        if self.o_bits >> index & 1:
+            return O
+        return 0
+
+    def bits(self, marker):
+        return self.x_bits if marker == X else self.o_bits
+
+    def drop_row(self, column):
+        # Row where a mark dropped into the column lands, or None if it is full
+        row = self.tops[column]
+        return row if row >= 0 else None
+
+    def completes_line(self, column, marker):
+        # True if a mark of the marker dropped into the column would complete a line
+        row = self.drop_row(column)
+        if row is None:
+            return False
+        cell = row * self.width + column
+        mine = self.bits(marker) | 1 << cell
+        for window in self.windows[cell]:
+            if mine & window == window:
+                return True
+        return False
+
+    def legal_moves(self):
+        if self.winner:
+            return []
+        return [col for col, row in enumerate(self.tops) if row >= 0]
+
+    def apply_move(self, move):
+        if self.winner or not 0 <= move < self.width or self.drop_row(move) is None:
+            raise ValueError(f"Illegal move: {move}")
+        self.make_move(move)
+
+    def make_move(self, move):
+        cell = self.tops[move] * self.width + move
+        self.tops[move] -= 1
+        bit = 1 << cell
+        if self.player == X:
+            self.x_bits |= bit
+            mine = self.x_bits
+        else:
+            self.o_bits |= bit
+            mine = self.o_bits
+        self.empty -= 1
+        self.key ^= CELLS[self.player][cell] ^ SIDE
+        self.winner_line = full_window(mine, self.windows[cell])
+        if self.winner_line:
+            self.winner = self.player
+        elif not self.empty:
+            self.winner = TIE
+        self.history.append(cell)
+        self.player = -self.player
+
+    def unmake_move(self):
+        # The undo stack keeps the cell the mark landed on, the move is its column
+        cell = self.history.pop()
+        self.player = -self.player
+        if self.player == X:
+            self.x_bits &= ~(1 << cell)
+        else:
+            self.o_bits &= ~(1 << cell)
+        self.empty += 1
+        self.key ^= CELLS[self.player][cell] ^ SIDE
+        self.winner = 0
+        self.winner_line = None
+        column = cell % self.width
+        self.tops[column] += 1
+        return column
+
+    def compute_key(self):
+        key = SIDE if self.player == O else 0
+        for cell in bit_indices(self.x_bits):
+            key ^= CELLS[X][cell]
+        for cell in bit_indices(self.o_bits):
+            key ^= CELLS[O][cell]
+        return key
+
+    def copy(self):
+        new = TetrisState.__new__(TetrisState)
+        new.width = self.width
+        new.height = self.height
+        new.k = self.k
+        new.windows = self.windows
+        new.tops = self.tops[:]
+        new.x_bits = self.x_bits
+        new.o_bits = self.o_bits
+        new.empty = self.empty
+        new.key = self.key
+        new.player = self.player
+        new.winner = self.winner
+        new.winner_line = self.winner_line
+        new.history = []
+        return new
+
+
+# Ultimate mode: nine small boards, a move is board * 9 + cell.
+# The cell played selects the board the opponent has to play on next.
+# Each player owns an 81-bit mask (9 bits per small board) and a 9-bit mask
+# of won small boards; drawn small boards are kept in a separate mask.
+class UltimateState:
+    def __init__(self):
+        self.x_bits = 0
+        self.o_bits = 0
+        self.x_big = 0
+        self.o_big = 0
+        self.tie_big = 0
+        self.active_board = None
+        self.key = ACTIVE[9]
+        self.player = X
+        self.winner = 0
+        self.winner_line = None
+        self.history = []
+
+    @property
+    def game_over(self):
+        return self.winner != 0
+
+    def cell(self, move):
+        if self.x_bits >> move & 1:
+            return X
+        if self.o_bits >> move & 1:
+            return O
+        return 0
+
+    def big_cell(self, board):
+        if self.x_big >> board & 1:
+            return X
+        if self.o_big >> board & 1:
+            return O
+        if self.tie_big >> board & 1:
+            return TIE
+        return 0
+
+    def board_bits(self, board, marker):
+        # 9-bit mask of the marker's cells on one small board
+        bits = self.x_bits if marker == X else self.o_bits
+        return bits >> (board * 9) & FULL
+
+    def active_index(self):
+        # Board the side to move has to play on, or 9 for a free choice
+        board = self.active_board
+        if board is None or (self.x_big | self.o_big | self.tie_big) >> board & 1:
+            return 9
+        return board
+
+    def open_boards(self):
+        # Boards the side to move may play on
+        done = self.x_big | self.o_big | self.tie_big
+        if self.active_board is not None and not done >> self.active_board & 1:
+            return [self.active_board]
+        return list(BITS[FULL & ~done])
+
+    def legal_moves(self):
+        if self.winner:
+            return []
+        taken = self.x_bits | self.o_bits
+        moves = []
+        for board in self.open_boards():
+            shift = board * 9
+            moves.extend(shift + i for i in BITS[FULL & ~(taken >> shift)])
+        return moves
+
+    def apply_move(self, move):
+        board, index = divmod(move, 9)
+        bit = 1 << move
+        if self.winner or (self.x_bits | self.o_bits) & bit or board not in self.open_boards():
+            raise ValueError(f"Illegal move: {move}")
+        self.make_move(move)
+
+    def make_move(self, move):
+        self.history.append((move, self.active_board, self.x_big, self.o_big, self.tie_big))
+        self.play(move)
+
+    def unmake_move(self):
+        active = self.active_index()
+        move, self.active_board, self.x_big, self.o_big, self.tie_big = self.history.pop()
+        self.player = -self.player
+        if self.player == X:
+            self.x_bits &= ~(1 << move)
+        else:
+            self.o_bits &= ~(1 << move)
+        self.key ^= ULTIMATE_CELLS[self.player][move] ^ ACTIVE[active] ^ ACTIVE[self.active_index()] ^ SIDE
+        self.winner = 0
+        self.winner_line = None
+        return move
+
+    def play(self, move):
+        # make_move without an undo record, for playouts that are never taken back
+        board, index = divmod(move, 9)
+        bit = 1 << move
+        shift = board * 9
+        # A legal move is on the active board unless the player had a free choice
+        active = board if self.active_board == board else 9
+        if self.player == X:
+            self.x_bits |= bit
+            if WINNING[self.x_bits >> shift & FULL]:
+                self.x_big |= 1 << board
+            big = self.x_big
+        else:
+            self.o_bits |= bit
+            if WINNING[self.o_bits >> shift & FULL]:
+                self.o_big |= 1 << board
+            big = self.o_big
+        if (self.x_bits | self.o_bits) >> shift & FULL == FULL and not (self.x_big | self.o_big) >> board & 1:
+            self.tie_big |= 1 << board
+
+        done = self.x_big | self.o_big | self.tie_big
+        if WINNING[big]:
+            self.winner = self.player
+            self.winner_line = win_line_through(big, board)
+        elif done == FULL:
+            self.winner = TIE
+        self.active_board = index
+        self.key ^= ULTIMATE_CELLS[self.player][move] ^ ACTIVE[active] ^ ACTIVE[9 if done >> index & 1 else index] ^ SIDE
+        self.player = -self.player
+
+    def compute_key(self):
+        key = SIDE if self.player == O else 0
+        for board in range(9):
+            for marker in (X, O):
+                for cell in BITS[self.board_bits(board, marker)]:
+                    key ^= ULTIMATE_CELLS[marker][board * 9 + cell]
+        return key ^ ACTIVE[self.active_index()]
+
+    def copy(self):
+        new = UltimateState.__new__(UltimateState)
+        new.x_bits = self.x_bits
+        new.o_bits = self.o_bits
+        new.x_big = self.x_big
+        new.o_big = self.o_big
+        new.tie_big = self.tie_big
+        new.active_board = self.active_board
+        new.key = self.key
+        new.player = self.player
+        new.winner = self.winner
+        new.winner_line = self.winner_line
+        new.history = []
+        return new
+
+
+MODES = {
+    "classic": ClassicState,
+    "3moves": ThreeMovesState,
+    "tetris": TetrisState,
+    "ultimate": UltimateState,
+    "gomoku": functools.partial(ClassicState, 15, 15, 5),
+    "connect4": functools.partial(TetrisState, 7, 6, 4),
+}
+
+
+def new_game(mode):
+    return MODES[mode]()
@@ -0,0 +1,245 @@
+import argparse
+import collections
+import os
+import struct
+import sys
+import time
+import zlib
+
+import engine
+from settings_store import config_dir
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compact binary records of played games.
+#
+# A record file is a header (magic, version, compression) followed by
+# blocks. A block is its stored length as a varint and its data, a run of
+# records compressed as one with zlib or zstd, or stored as is. A record is
+# its length as a varint, the mode id, the result and one byte per move, so
+# a game of Classic takes 3 + 9 bytes at most. Every mode's moves fit a
+# byte, up to the 225 cells of Gomoku.
+#
+# Files are only ever appended to. A writer keeps one block in memory; a
+# reader decodes one block at a time, so files of any size can be walked
+# with a generator. A block cut short by a crash ends the file for readers
+# and is dropped by the next writer.
+#
+#   python -m game_records stats FILE
+
+MAGIC = b"TTTR"
+VERSION = 1
+HEADER = struct.Struct("<4sBB")
+BLOCK_SIZE = 1 << 16
+
+COMPRESSIONS = {"none": 0, "zlib": 1, "zstd": 2}
+
+# Mode ids as stored in records: new modes are appended, never reordered
+MODES = ("classic", "3moves", "tetris", "ultimate", "gomoku", "connect4")
+MODE_IDS = {mode: i for i, mode in enumerate(MODES)}
+
+# Results as stored: 0 for a game left unfinished
+RESULT_CODES = {0: 0, engine.X: 1, engine.O: 2, engine.TIE: 3}
+RESULTS = {code: result for result, code in RESULT_CODES.items()}
+
+LOG_NAME = "games.ttr"
+
+# A game read back; moves are bytes, iterating them gives the moves
+GameRecord = collections.namedtuple("GameRecord", "mode moves result")
+
+
+def log_path():
+    # The player's own game log, next to their settings
+    return os.path.join(config_dir(), LOG_NAME)
+
+
+def encode_varint(value):
+    data = bytearray()
+    while value >= 0x80:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+def decode_varint(data, pos):
+    # (value, position after it)
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _read_varint(f):
+    # Varint from a file, or None at the end of the file or in a cut off varint
+    value = shift = 0
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
+def encode_record(mode, moves, result):
+    payload = bytes((MODE_IDS[mode], RESULT_CODES[result])) + bytes(moves)
+    return encode_varint(len(payload)) + payload
+
+
+def played_moves(state):
+    # Moves of the game so far, read back from the undo stack
+    moves = []
+    while state.history:
+        moves.append(state.unmake_move())
+    moves.reverse()
+    for move in moves:
+        state.make_move(move)
+    return moves
+
+
+def _codec(compression):
+    # (compress, decompress) functions of a compression id
+    if compression == COMPRESSIONS["none"]:
+        return bytes, bytes
+    if compression == COMPRESSIONS["zlib"]:
+        return (lambda data: zlib.compress(data, 6)), zlib.decompress
+    if compression == COMPRESSIONS["zstd"]:
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def _read_header(f):
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("Not a game record file")
+    magic, version, compression = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a game record file")
+    return compression
+
+
+def _complete_length(f):
+    # Length of the file up to the end of its last complete block
+    end = f.tell()
+    while True:
+        length = _read_varint(f)
+        if length is None:
+            return end
+        f.seek(length, os.SEEK_CUR)
+        if f.tell() > os.fstat(f.fileno()).st_size:
+            return end
+        end = f.tell()
+
+
+class RecordWriter:
+    # Appends games to a record file, one block at a time
+    def __init__(self, path, compression="none", block_size=BLOCK_SIZE):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.block_size = block_size
+        self.buffer = bytearray()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # Keep the file's own compression and drop a block cut short by a crash
+            self.file = open(path, "r+b")
+            self.compression = _read_header(self.file)
+            self.file.truncate(_complete_length(self.file))
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.file = open(path, "wb")
+            self.compression = COMPRESSIONS[compression]
+            self.file.write(HEADER.pack(MAGIC, VERSION, self.compression))
+        self.compress = _codec(self.compression)[0]
+
+    def write(self, mode, moves, result):
+        self.write_encoded(encode_record(mode, moves, result))
+
+    def write_encoded(self, records):
+        # Add records already encoded with encode_record()
+        self.buffer += records
+        if len(self.buffer) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        # Write the buffered records as a block
+        if not self.buffer:
+            return
+        data = self.compress(bytes(self.buffer))
+        self.file.write(encode_varint(len(data)) + data)
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_records(path):
+    # Every game of a record file, in the order they were written
+    with open(path, "rb") as f:
+        decompress = _codec(_read_header(f))[1]
+        while True:
+            length = _read_varint(f)
+            if length is None:
+                return
+            data = f.read(length)
+            if len(data) < length:
+                return
+            block = decompress(data)
+            pos = 0
+            while pos < len(block):
+                size, pos = decode_varint(block, pos)
+                yield GameRecord(MODES[block[pos]], block[pos + 2:pos + size], RESULTS[block[pos + 1]])
+                pos += size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m game_records", description="Inspect game record files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats_parser = commands.add_parser("stats", help="count the games and results of a record file")
+    stats_parser.add_argument("path", nargs="?", default=log_path(), help="record file (default: the player's game log)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    games = collections.Counter()
+    results = collections.Counter()
+    moves = 0
+    for record in read_records(args.path):
+        games[record.mode] += 1
+        results[record.mode, record.result] += 1
+        moves += len(record.moves)
+    elapsed = time.perf_counter() - start
+
+    total = sum(games.values())
+    size = os.path.getsize(args.path)
+    print(f"{args.path}: {total} games, {moves} moves, {size} bytes, read in {elapsed:.2f}s")
+    names = {engine.X: "X", engine.O: "O", engine.TIE: "tie", 0: "unfinished"}
+    for mode in MODES:
+        if games[mode]:
+            counts = ", ".join(f"{names[result]} {results[mode, result]}" for result in RESULTS.values() if results[mode, result])
+            print(f"  {mode}: {games[mode]} games ({counts})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,48 @@
 import pygame
 import sys
 import json
-import random
-
-# Initialize Pygame and the mixer
-pygame.init()
-pygame.mixer.init()
+import math
+
+import engine
+import bots
+import mcts
+from thinker import BotThinker
+from frames import FrameScheduler
+from profiler import profiler
+from text_cache import render_text
+from animation import Animator, ease_in_quad, ease_out_cubic
+import assets
+import sprites
+import game_records
+from settings_store import store as settings_store
 
 # Screen dimensions
 SCREEN_WIDTH = 600
 SCREEN_HEIGHT = 800
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Tic-Tac-Toe Collection")
 
-# Fonts
-font = pygame.font.Font(None, 74)
-button_font = pygame.font.Font(None, 50)
-description_font = pygame.font.Font(None, 36)
+# Font sizes
+TITLE_FONT = 74
+BUTTON_FONT = 50
+DESCRIPTION_FONT = 36
 
-# Icon
-game_icon = pygame.image.load('src/icon.png')
-pygame.display.set_icon(game_icon)
+# Animation durations in milliseconds
+PLACE_MS = 120     # A new mark grows to full size
+WIN_LINE_MS = 300  # The winning line is drawn across
+DROP_MS = 170      # A Tetris-like piece falls one row; n rows take DROP_MS * sqrt(n)
 
-# Load settings from file
-def load_settings():
-    with open('src/settings.json', 'r') as f:
-        settings = json.load(f)
-    return settings
+# `python main.py --first-frame` quits once the first menu frame is on
+# screen; the startup benchmark (python -m benchmark startup) times it
+FIRST_FRAME_ONLY = "--first-frame" in sys.argv
 
-settings = load_settings()
+# Load the player's settings (see settings_store.py)
+settings = settings_store.load()
 game_volume = settings["game_volume"]
 music_volume = settings["music_volume"]
 theme_name = settings["theme"]
+bot_difficulty = settings["bot_difficulty"]
+bot_think_ms = settings["bot_think_ms"]
+bot_workers = settings["bot_workers"]
+fps_cap = settings["fps_cap"]
 
 # Load themes from file
 def load_themes():
@@ -40,17 +51,37 @@ def load_themes():
     return themes
 
 themes = load_themes()
+if theme_name not in themes:
+    theme_name = next(iter(themes))
 theme = themes[theme_name]
 
-# Save settings to file
+# Save settings in the background, the file is written once they stop changing
 def save_settings():
     settings = {
         "game_volume": game_volume,
         "music_volume": music_volume,
-        "theme": theme_name
+        "theme": theme_name,
+        "bot_difficulty": bot_difficulty,
+        "bot_think_ms": bot_think_ms,
+        "bot_workers": bot_workers,
+        "fps_cap": fps_cap
     }
-    with open('src/settings.json', 'w') as f:
-        json.dump(settings, f)
+    settings_store.save(settings)
+
+# Finished games are appended to the player's game log (see game_records.py)
+game_log = None
+
+def log_game(mode, state):
+    global game_log
+    if not state.game_over:
+        return
+    try:
+        if game_log is None:
+            game_log = game_records.RecordWriter(game_records.log_path())
+        game_log.write(mode, game_records.played_moves(state), state.winner)
+        game_log.flush()
+    except (OSError, ValueError) as error:
+        print(f"Game not logged: {error}")
 
 # Apply the current theme to UI elements
 def apply_theme():
@@ -59,21 +90,34 @@ def apply_theme():
     screen.fill(theme["background_color"])
 
     # Update colors for all buttons and other UI elements
-    for button in main_menu_buttons + [arrow_left, arrow_right, select_button, back_button, theme_left, theme_right, settings_back_button, save_changes_button]:
+    for button in main_menu_buttons + [arrow_left, arrow_right, select_button, back_button, theme_left, theme_right, difficulty_left, difficulty_right, settings_back_button, save_changes_button]:
         button.draw(screen)
 
     game_volume_slider.draw(screen)
     music_volume_slider.draw(screen)
     checkbox_bot.draw(screen)
 
-# Load sound effects
-click_sound = pygame.mixer.Sound("src/click.mp3")
-click_sound.set_volume(game_volume)
+# Initialize Pygame, the window, fonts and sounds.
+# Bot worker processes import this module as well, so nothing is
+# initialized until the game is actually started.
+def init_game():
+    global screen, click_sound
+
+    # Only what the first frame needs; pygame.init() would also open the
+    # audio device, which assets.py does on a background thread
+    pygame.display.init()
+    pygame.font.init()
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Tic-Tac-Toe Collection")
 
-# Load and play background music
-pygame.mixer.music.load("src/background_music.mp3")
-pygame.mixer.music.set_volume(music_volume)
-pygame.mixer.music.play(-1)  # Play indefinitely
+    # Icon
+    game_icon = pygame.image.load('src/icon.png')
+    pygame.display.set_icon(game_icon)
+
+    # Click sound and background music, silent until they are loaded
+    click_sound = assets.click_sound
+    assets.load_audio(game_volume, music_volume)
 
 # Button class
 class Button:
@@ -90,7 +134,7 @@ class Button:
             color = theme["button_color"]
         pygame.draw.rect(screen, color, self.rect)
 
-        text_surface = button_font.render(self.text, True, theme["font_color"])
+        text_surface = render_text(self.text, theme["font_color"], BUTTON_FONT)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -113,7 +157,7 @@ class Checkbox:
         if self.checked:
             pygame.draw.rect(screen, theme["font_color"], self.rect.inflate(-4, -4))
 
-        label_surface = description_font.render(self.label, True, theme["font_color"])
+        label_surface = render_text(self.label, theme["font_color"], DESCRIPTION_FONT)
         label_rect = label_surface.get_rect(midleft=(self.rect.right + 10, self.rect.centery))
         screen.blit(label_surface, label_rect)
 
@@ -144,7 +188,7 @@ class Slider:
         pygame.draw.rect(screen, theme["font_color"], handle_rect)
 
         if self.label:
-            label_surface = description_font.render(f"{self.label}: {int(self.value * 100)}%", True, theme["font_color"])
+            label_surface = render_text(f"{self.label}: {int(self.value * 100)}%", theme["font_color"], DESCRIPTION_FONT)
             label_rect = label_surface.get_rect(midleft=(self.rect.right + 10, self.rect.centery))
             screen.blit(label_surface, label_rect)
 
@@ -162,7 +206,6 @@ class Slider:
                 self.action(self.value)
 
 # Theme selection logic
-themes = load_themes()
 theme_names = list(themes.keys())
 current_theme_index = theme_names.index(theme_name)
 
@@ -170,33 +213,55 @@ def previous_theme():
     global current_theme_index, theme_name
     current_theme_index = (current_theme_index - 1) % len(theme_names)
     theme_name = theme_names[current_theme_index]
+    sprites.clear()  # The sprites hold the old theme's colors
     apply_theme()
 
 def next_theme():
     global current_theme_index, theme_name
     current_theme_index = (current_theme_index + 1) % len(theme_names)
     theme_name = theme_names[current_theme_index]
+    sprites.clear()  # The sprites hold the old theme's colors
     apply_theme()
 
+# Bot difficulty selection logic
+def previous_difficulty():
+    global bot_difficulty
+    index = bots.DIFFICULTIES.index(bot_difficulty)
+    bot_difficulty = bots.DIFFICULTIES[(index - 1) % len(bots.DIFFICULTIES)]
+
+def next_difficulty():
+    global bot_difficulty
+    index = bots.DIFFICULTIES.index(bot_difficulty)
+    bot_difficulty = bots.DIFFICULTIES[(index + 1) % len(bots.DIFFICULTIES)]
+
+
+# Scene manager: every screen runs its loop only while it is the current
+# scene. Switching screens just sets the scene and returns, and run_scenes()
+# starts the next one, so the call stack stays flat for the whole session.
+scene = "menu"
+
+def switch_scene(name):
+    global scene
+    scene = name
 
 # Button actions
 def play_game():
-    game_mode_screen()
+    switch_scene("mode_select")
 
 def open_settings():
-    settings_menu()
+    switch_scene("settings")
 
 def quit_game():
     pygame.quit()
     sys.exit()
 
 def back_to_menu():
-    main_menu()
+    switch_scene("menu")
 
 def save_changes():
     save_settings()
-    print(f"Settings Saved - Game Volume: {int(game_volume * 100)}%, Music Volume: {int(music_volume * 100)}%, Theme: {theme_name}")
-    main_menu()
+    print(f"Settings Saved - Game Volume: {int(game_volume * 100)}%, Music Volume: {int(music_volume * 100)}%, Theme: {theme_name}, Bot: {bot_difficulty}")
+    switch_scene("menu")
 
 def previous_mode():
     global current_mode
@@ -210,6 +275,10 @@ def select_mode():
     mode_name = game_modes[current_mode]["name"]
     mode_type = "Bot" if checkbox_bot.checked else "Real Player"
     print(f"{mode_name} selected! Playing against: {mode_type}")
+    switch_scene("game")
+
+def run_selected_mode():
+    mode_name = game_modes[current_mode]["name"]
     if mode_name == "Classic":
         run_game_mode_classic(theme, checkbox_bot.checked)
     elif mode_name == "3-Tac":
@@ -218,6 +287,10 @@ def select_mode():
         run_game_mode_tetris(theme, checkbox_bot.checked)
     elif mode_name == "Ultimate Tic-tac-toe":
         run_game_mode_ultimate(theme, checkbox_bot.checked)
+    elif mode_name == "Gomoku":
+        run_game_mode_classic(theme, checkbox_bot.checked, "gomoku")
+    elif mode_name == "Connect Four":
+        run_game_mode_tetris(theme, checkbox_bot.checked, "connect4")
 
 # Create buttons
 main_menu_buttons = [
@@ -231,6 +304,8 @@ game_modes = [
     {"name": "3-Tac", "desc": "You are limited to 3 last moves"},
     {"name": "Tetris-like", "desc": "Tic-tac-toe + tetris"},
     {"name": "Ultimate Tic-tac-toe", "desc": "Meta-game"},
+    {"name": "Gomoku", "desc": "15x15 board, 5 in a row"},
+    {"name": "Connect Four", "desc": "Tetris-like, 7x6 board, 4 in a row"},
 ]
 
 current_mode = 0
@@ -248,13 +323,11 @@ def set_game_volume(value):
     global game_volume
     game_volume = value
     click_sound.set_volume(game_volume)
-    print(f"Game Volume: {int(game_volume * 100)}%")
 
 def set_music_volume(value):
     global music_volume
     music_volume = value
-    pygame.mixer.music.set_volume(music_volume)
-    print(f"Music Volume: {int(music_volume * 100)}%")
+    assets.set_music_volume(music_volume)
 
 # Settings sliders
 game_volume_slider = Slider(
@@ -269,59 +342,94 @@ theme_right = Button(">", (SCREEN_WIDTH // 2) + 110, 420, 40, 40, next_theme)
 # Display current theme
 def draw_current_theme(screen):
     theme_text = theme_name
-    theme_surface = description_font.render(f"Theme: {theme_text}", True, theme["font_color"])
+    theme_surface = render_text(f"Theme: {theme_text}", theme["font_color"], DESCRIPTION_FONT)
     theme_rect = theme_surface.get_rect(center=((SCREEN_WIDTH // 2), 440))
     screen.blit(theme_surface, theme_rect)
 
+# Bot difficulty selection with arrows
+difficulty_left = Button("<", (SCREEN_WIDTH // 2) - 150, 490, 40, 40, previous_difficulty)
+difficulty_right = Button(">", (SCREEN_WIDTH // 2) + 110, 490, 40, 40, next_difficulty)
+
+# Display current bot difficulty
+def draw_current_difficulty(screen):
+    difficulty_surface = render_text(f"Bot: {bot_difficulty}", theme["font_color"], DESCRIPTION_FONT)
+    difficulty_rect = difficulty_surface.get_rect(center=((SCREEN_WIDTH // 2), 510))
+    screen.blit(difficulty_surface, difficulty_rect)
+
 # Settings back button and save button
 settings_back_button = Button("Back", (SCREEN_WIDTH // 2) + 125, 650, 150, 60, back_to_menu)
 save_changes_button = Button("Save", (SCREEN_WIDTH // 2) - 75, 650, 150, 60, save_changes)
 
 # Settings menu
 def settings_menu():
-    while True:
-        screen.fill(theme["background_color"])
-        title_surface = font.render("Settings", True, theme["font_color"])
-        title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        screen.blit(title_surface, title_rect)
-
-        game_volume_slider.draw(screen)
-        music_volume_slider.draw(screen)
-        theme_left.draw(screen)
-        theme_right.draw(screen)
-        draw_current_theme(screen)
-        settings_back_button.draw(screen)
-        save_changes_button.draw(screen)
+    scheduler = FrameScheduler(fps_cap, "settings")
+    while scene == "settings":
+        if scheduler.needs_redraw:
+            screen.fill(theme["background_color"])
+            title_surface = render_text("Settings", theme["font_color"], TITLE_FONT)
+            title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 100))
+            screen.blit(title_surface, title_rect)
+
+            game_volume_slider.draw(screen)
+            music_volume_slider.draw(screen)
+            theme_left.draw(screen)
+            theme_right.draw(screen)
+            draw_current_theme(screen)
+            difficulty_left.draw(screen)
+            difficulty_right.draw(screen)
+            draw_current_difficulty(screen)
+            settings_back_button.draw(screen)
+            save_changes_button.draw(screen)
+            profiler.mark("draw")
+            scheduler.present()
 
         for event in pygame.event.get():
+            # Menus are cheap to draw and highlight hovered buttons, so any event redraws them
+            scheduler.handle_event(event)
+            scheduler.invalidate()
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 click_sound.play()
-                main_menu()
+                switch_scene("menu")
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
-                    for button in [settings_back_button, save_changes_button, theme_left, theme_right]:
+                    for button in [settings_back_button, save_changes_button, theme_left, theme_right, difficulty_left, difficulty_right]:
                         button.handle_event(event)
             game_volume_slider.handle_event(event)
             music_volume_slider.handle_event(event)
+            if scene != "settings":
+                # The screen was left; the rest of this frame's events are dropped on purpose
+                break
+        profiler.mark("events")
 
-        pygame.display.update()
+        scheduler.tick()
 
 # Main menu loop
 def main_menu():
     apply_theme()  # Apply the theme colors at the start
-    while True:
-        screen.fill(theme["background_color"])
-        title_surface = font.render("Tic-Tac-Toe Collection", True, theme["font_color"])
-        title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        screen.blit(title_surface, title_rect)
-
-        for button in main_menu_buttons:
-            button.draw(screen)
+    scheduler = FrameScheduler(fps_cap, "menu")
+    while scene == "menu":
+        if scheduler.needs_redraw:
+            screen.fill(theme["background_color"])
+            title_surface = render_text("Tic-Tac-Toe Collection", theme["font_color"], TITLE_FONT)
+            title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 100))
+            screen.blit(title_surface, title_rect)
+
+            for button in main_menu_buttons:
+                button.draw(screen)
+            profiler.mark("draw")
+            scheduler.present()
+            if FIRST_FRAME_ONLY:
+                print("first frame", flush=True)
+                pygame.quit()
+                sys.exit()
 
         for event in pygame.event.get():
+            # Menus are cheap to draw and highlight hovered buttons, so any event redraws them
+            scheduler.handle_event(event)
+            scheduler.invalidate()
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 pygame.quit()
                 sys.exit()
@@ -329,42 +437,53 @@ def main_menu():
                 if event.button == 1:
                     for button in main_menu_buttons:
                         button.handle_event(event)
+            if scene != "menu":
+                # The screen was left; the rest of this frame's events are dropped on purpose
+                break
+        profiler.mark("events")
 
-        pygame.display.update()
+        scheduler.tick()
 
 # Game mode screen
 def game_mode_screen():
     checkbox_bot.checked = False
-    while True:
-        screen.fill(theme["background_color"])
-        title_surface = font.render("Select Game Mode", True, theme["font_color"])
-        title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        screen.blit(title_surface, title_rect)
-
-        mode_name = game_modes[current_mode]["name"]
-        mode_desc = game_modes[current_mode]["desc"]
-
-        mode_name_surface = button_font.render(mode_name, True, theme["font_color"])
-        mode_name_rect = mode_name_surface.get_rect(center=(SCREEN_WIDTH // 2, 250))
-        screen.blit(mode_name_surface, mode_name_rect)
-
-        mode_desc_surface = description_font.render(mode_desc, True, theme["font_color"])
-        mode_desc_rect = mode_desc_surface.get_rect(center=(SCREEN_WIDTH // 2, 300))
-        screen.blit(mode_desc_surface, mode_desc_rect)
-
-        arrow_left.draw(screen)
-        arrow_right.draw(screen)
-        select_button.draw(screen)
-        back_button.draw(screen)
-        checkbox_bot.draw(screen)
+    scheduler = FrameScheduler(fps_cap, "mode_select")
+    while scene == "mode_select":
+        if scheduler.needs_redraw:
+            screen.fill(theme["background_color"])
+            title_surface = render_text("Select Game Mode", theme["font_color"], TITLE_FONT)
+            title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 100))
+            screen.blit(title_surface, title_rect)
+
+            mode_name = game_modes[current_mode]["name"]
+            mode_desc = game_modes[current_mode]["desc"]
+
+            mode_name_surface = render_text(mode_name, theme["font_color"], BUTTON_FONT)
+            mode_name_rect = mode_name_surface.get_rect(center=(SCREEN_WIDTH // 2, 250))
+            screen.blit(mode_name_surface, mode_name_rect)
+
+            mode_desc_surface = render_text(mode_desc, theme["font_color"], DESCRIPTION_FONT)
+            mode_desc_rect = mode_desc_surface.get_rect(center=(SCREEN_WIDTH // 2, 300))
+            screen.blit(mode_desc_surface, mode_desc_rect)
+
+            arrow_left.draw(screen)
+            arrow_right.draw(screen)
+            select_button.draw(screen)
+            back_button.draw(screen)
+            checkbox_bot.draw(screen)
+            profiler.mark("draw")
+            scheduler.present()
 
         for event in pygame.event.get():
+            # Menus are cheap to draw and highlight hovered buttons, so any event redraws them
+            scheduler.handle_event(event)
+            scheduler.invalidate()
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 click_sound.play()
-                main_menu()
+                switch_scene("menu")
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_LEFT:
                 click_sound.play()
                 previous_mode()
@@ -376,18 +495,29 @@ def game_mode_screen():
                     for button in [arrow_left, arrow_right, select_button, back_button]:
                         button.handle_event(event)
                     checkbox_bot.handle_event(event)
+            if scene != "mode_select":
+                # The screen was left; the rest of this frame's events are dropped on purpose
+                break
+        profiler.mark("events")
 
-        pygame.display.update()
+        scheduler.tick()
 
 
-def run_game_mode_classic(theme, play_with_bot=False):
+def run_game_mode_classic(theme, play_with_bot=False, mode="classic"):
 
     # Constants
     screen_width, screen_height = 600, 800
     grid_size = 500
     offset = (screen_width - grid_size) // 2
-    cell_size = grid_size // 3
-    font = pygame.font.Font(None, 40)
+
+    # Board of the mode; cells are sized so the longer side fills the grid area
+    state = engine.new_game(mode)
+    width, height = state.width, state.height
+    cell_size = grid_size // max(width, height)
+    board_left = offset + (grid_size - cell_size * width) // 2
+    board_top = offset + (grid_size - cell_size * height) // 2
+    line_width = max(2, cell_size // 20)
+    mark_width = max(2, cell_size // 16)
 
     # Theme Colors
     bg_color = theme["background_color"]
@@ -397,130 +527,130 @@ def run_game_mode_classic(theme, play_with_bot=False):
     o_color = theme["o_color"]
     highlight_color = theme["highlight_color"]
 
-    # Initialize the markers
-    markers = [[0 for _ in range(3)] for _ in range(3)]
+    bot_move = bots.get_bot(mode, bot_difficulty, bot_think_ms, bot_workers, book=True)
+    thinker = BotThinker()
+    scheduler = FrameScheduler(fps_cap, mode)
+    animator = Animator()
+
+    # Screen area below the board with the scores and the result
+    status_rect = pygame.Rect(0, grid_size + offset, screen_width, screen_height - grid_size - offset)
     clicked = False
-    player = 1
     player1_score, player2_score = 0, 0
-    game_over = False
-    winner = 0
-    winner_line = None  # To store the coordinates of the winning line
+    redo_moves = []  # Moves taken back with Ctrl+Z, the next one to redo last
+    placed_cell = None  # Cell of the last mark placed, grows in while "place" runs
+    frame_ms = 0
+
+    def build_board():
+        # Background and grid lines, rendered once per theme
+        surface = pygame.Surface((screen_width, screen_height))
+        surface.fill(bg_color)
+        board_right = board_left + cell_size * width
+        board_bottom = board_top + cell_size * height
+        for col in range(1, width):
+            x = col * cell_size + board_left
+            pygame.draw.line(surface, grid_color, (x, board_top), (x, board_bottom), line_width)
+        for row in range(1, height):
+            y = row * cell_size + board_top
+            pygame.draw.line(surface, grid_color, (board_left, y), (board_right, y), line_width)
+        return surface.convert()
 
     def draw_grid():
-        screen.fill(bg_color)
-        for x in range(1, 3):
-            pygame.draw.line(screen, grid_color, (x * cell_size + offset, offset), (x * cell_size + offset, grid_size + offset), 8)
-            pygame.draw.line(screen, grid_color, (offset, x * cell_size + offset), (grid_size + offset, x * cell_size + offset), 8)
+        screen.blit(sprites.cached(f"{mode} board", build_board), (0, 0))
 
     def draw_xo():
-        top_shift = round(cell_size * 0.15)
-        bottom_shift = round(cell_size * 0.85)
-        for row in range(3):
-            for col in range(3):
-                x_pos = col * cell_size + offset
-                y_pos = row * cell_size + offset
-                if markers[row][col] == 1:
-                    pygame.draw.line(screen, x_color, (x_pos + top_shift, y_pos + top_shift), (x_pos + bottom_shift, y_pos + bottom_shift), 8)
-                    pygame.draw.line(screen, x_color, (x_pos + top_shift, y_pos + bottom_shift), (x_pos + bottom_shift, y_pos + top_shift), 8)
-                elif markers[row][col] == -1:
-                    pygame.draw.circle(screen, o_color, (x_pos + cell_size // 2, y_pos + cell_size // 2), (cell_size // 2) - 20, 10)
+        x_image = sprites.x_sprite(cell_size, x_color, round(cell_size * 0.15), round(cell_size * 0.85), line_width)
+        o_image = sprites.o_sprite(cell_size, o_color, round(cell_size * 0.38), mark_width)
+        for row in range(height):
+            for col in range(width):
+                x_pos = col * cell_size + board_left
+                y_pos = row * cell_size + board_top
+                marker = state.cell(row * width + col)
+                scale = animator.value("place", 1.0) if row * width + col == placed_cell else 1.0
+                if marker == engine.X:
+                    sprites.blit_scaled(screen, x_image, (x_pos, y_pos), scale)
+                elif marker == engine.O:
+                    sprites.blit_scaled(screen, o_image, (x_pos, y_pos), scale)
 
     def draw_players_score():
-        p1_font = pygame.font.SysFont(None, 40)
         p1_color = theme["p1_color"]
-        p2_font = pygame.font.SysFont(None, 40)
         p2_color = theme["p2_color"]
-        if player == -1:
-            p1_font, p2_font = p2_font, p1_font
+        if state.player == engine.O:
             p1_color, p2_color = p2_color, p1_color
 
-        p1_img = p1_font.render('Player X: ' + str(player1_score), True, p1_color)
+        p1_img = render_text('Player X: ' + str(player1_score), p1_color, 40)
         p1_rect = p1_img.get_rect(center=(screen_width // 3, grid_size + offset * 2))
         screen.blit(p1_img, p1_rect)
 
-        p2_img = p2_font.render('Player O: ' + str(player2_score), True, p2_color)
+        p2_img = render_text('Player O: ' + str(player2_score), p2_color, 40)
         p2_rect = p2_img.get_rect(center=(screen_width - screen_width // 3, grid_size + offset * 2))
         screen.blit(p2_img, p2_rect)
 
-        esc_font = pygame.font.SysFont(None, 30)
-        esc_img = esc_font.render("Esc - menu", True, font_color)
+        esc_img = render_text("Esc - menu", font_color, 30)
         ecs_rect = esc_img.get_rect(center=(60, 20))
         screen.blit(esc_img, ecs_rect)
 
-    def check_winner():
-        nonlocal winner, game_over, player1_score, player2_score, winner_line
-
-        # Check rows
-        for row in range(3):
-            if sum(markers[row]) == 3:
-                winner = 1
-                player1_score += 1
-                game_over = True
-                winner_line = [(row, 0), (row, 2)]
-                return
-            elif sum(markers[row]) == -3:
-                winner = 2
-                player2_score += 1
-                game_over = True
-                winner_line = [(row, 0), (row, 2)]
-                return
-
-        # Check columns
-        for col in range(3):
-            col_sum = markers[0][col] + markers[1][col] + markers[2][col]
-            if col_sum == 3:
-                winner = 1
-                player1_score += 1
-                game_over = True
-                winner_line = [(0, col), (2, col)]
-                return
-            elif col_sum == -3:
-                winner = 2
-                player2_score += 1
-                game_over = True
-                winner_line = [(0, col), (2, col)]
-                return
+        undo_img = render_text("Ctrl+Z/Y - undo/redo", font_color, 30)
+        undo_rect = undo_img.get_rect(center=(screen_width - 115, 20))
+        screen.blit(undo_img, undo_rect)
 
-        # Check diagonals
-        diag1 = markers[0][0] + markers[1][1] + markers[2][2]
-        diag2 = markers[0][2] + markers[1][1] + markers[2][0]
-
-        if diag1 == 3:
-            winner = 1
-            player1_score += 1
-            game_over = True
-            winner_line = [(0, 0), (2, 2)]
-        elif diag1 == -3:
-            winner = 2
-            player2_score += 1
-            game_over = True
-            winner_line = [(0, 0), (2, 2)]
-        elif diag2 == 3:
-            winner = 1
+    def update_score():
+        nonlocal player1_score, player2_score
+        if state.winner == engine.X:
             player1_score += 1
-            game_over = True
-            winner_line = [(0, 2), (2, 0)]
-        elif diag2 == -3:
-            winner = 2
+        elif state.winner == engine.O:
             player2_score += 1
-            game_over = True
-            winner_line = [(0, 2), (2, 0)]
 
-        # Check for a tie
-        if all(marker != 0 for row in markers for marker in row) and winner == 0:
-            winner = -1
-            game_over = True
+    def undo_move():
+        # Take back the last move; against the bot, back to the player's previous turn
+        nonlocal player1_score, player2_score
+        thinker.cancel()
+        animator.cancel()
+        steps = 2 if play_with_bot and state.player == engine.X else 1
+        for _ in range(min(steps, len(state.history))):
+            if state.winner == engine.X:
+                player1_score -= 1
+            elif state.winner == engine.O:
+                player2_score -= 1
+            redo_moves.append(state.unmake_move())
+        scheduler.invalidate()
+
+    def redo_move():
+        # Play taken back moves again; against the bot, its reply comes back too
+        animator.cancel()
+        while redo_moves:
+            state.apply_move(redo_moves.pop())
+            update_score()
+            if not play_with_bot or state.player == engine.X or state.game_over:
+                break
+        scheduler.invalidate()
+
+    def invalidate_move(move):
+        # Only the played cell and the scores change, unless the game ended
+        if state.game_over:
+            scheduler.invalidate()
+            return
+        row, col = divmod(move, width)
+        scheduler.invalidate((col * cell_size + board_left, row * cell_size + board_top, cell_size, cell_size))
+        scheduler.invalidate(status_rect)
+
+    def animate_move(move):
+        # The new mark grows in; a winning move also draws its line across
+        nonlocal placed_cell
+        placed_cell = move
+        row, col = divmod(move, width)
+        animator.start("place", 0.3, 1.0, PLACE_MS, ease_out_cubic, (col * cell_size + board_left, row * cell_size + board_top, cell_size, cell_size))
+        if state.winner_line:
+            animator.start("win line", 0.0, 1.0, WIN_LINE_MS, ease_out_cubic)
 
     def draw_winner_text(winner):
-        if winner == -1:
+        if winner == engine.TIE:
             win_text = 'Tie!'
         else:
-            win_text = f'Player {"X" if winner == 1 else "O"} wins!'
+            win_text = f'Player {"X" if winner == engine.X else "O"} wins!'
 
-        text = font.render(win_text, True, font_color)
+        text = render_text(win_text, font_color, 40)
         text_rect = text.get_rect(center=(screen_width // 2, grid_size + offset + ((screen_height - (grid_size + offset)) // 2)))
-        pa_font = pygame.font.SysFont(None, 60, bold=True, italic=True)
-        play_again_img = pa_font.render("Press SPACE to play again", True, font_color)
+        play_again_img = render_text("Press SPACE to play again", font_color, 60, bold=True, italic=True)
         play_again_rect = play_again_img.get_rect(center=(screen_width // 2, text_rect.bottom + offset))
         screen.blit(text, text_rect)
         screen.blit(play_again_img, play_again_rect)
@@ -530,119 +660,106 @@ def run_game_mode_classic(theme, play_with_bot=False):
         if not winner_line:
             return
         # Start and end points based on the grid
-        start_pos = winner_line[0]
-        end_pos = winner_line[1]
-
-        # Convert grid positions to pixel positions
-        start_px = (start_pos[1] * cell_size + cell_size // 2 + offset, start_pos[0] * cell_size + cell_size // 2 + offset)
-        end_px = (end_pos[1] * cell_size + cell_size // 2 + offset, end_pos[0] * cell_size + cell_size // 2 + offset)
-
-        pygame.draw.line(screen, highlight_color, start_px, end_px, 10)
-
-    def bot_move():
-        # Check for possible winning move to take or to block opponent's winning move
-        for player_marker in [-1, 1]:
-            for row in range(3):
-                if sum(markers[row]) == player_marker * 2:
-                    for col in range(3):
-                        if markers[row][col] == 0:
-                            markers[row][col] = -1
-                            return
-
-            for col in range(3):
-                col_sum = sum(markers[r][col] for r in range(3))
-                if col_sum == player_marker * 2:
-                    for row in range(3):
-                        if markers[row][col] == 0:
-                            markers[row][col] = -1
-                            return
-
-            # Diagonal checks
-            diag1 = sum(markers[i][i] for i in range(3))
-            if diag1 == player_marker * 2:
-                for i in range(3):
-                    if markers[i][i] == 0:
-                        markers[i][i] = -1
-                        return
-
-            diag2 = sum(markers[i][2 - i] for i in range(3))
-            if diag2 == player_marker * 2:
-                for i in range(3):
-                    if markers[i][2 - i] == 0:
-                        markers[i][2 - i] = -1
-                        return
-
-        # No winning or blocking move, choose random empty cell
-        empty_cells = [(r, c) for r in range(3) for c in range(3) if markers[r][c] == 0]
-        if empty_cells:
-            row, col = random.choice(empty_cells)
-            markers[row][col] = -1
+        start_pos = divmod(winner_line[0], width)
+        end_pos = divmod(winner_line[-1], width)
 
+        # Convert grid positions to pixel positions; the line grows from its start while animated
+        start_px = (start_pos[1] * cell_size + cell_size // 2 + board_left, start_pos[0] * cell_size + cell_size // 2 + board_top)
+        end_px = (end_pos[1] * cell_size + cell_size // 2 + board_left, end_pos[0] * cell_size + cell_size // 2 + board_top)
+        progress = animator.value("win line", 1.0)
+        end_px = (start_px[0] + (end_px[0] - start_px[0]) * progress, start_px[1] + (end_px[1] - start_px[1]) * progress)
 
+        pygame.draw.line(screen, highlight_color, start_px, end_px, mark_width)
 
     def get_cell_from_click(pos):
         x, y = pos
-        if offset <= x <= offset + grid_size and offset <= y <= offset + grid_size:
-            col = (x - offset) // cell_size
-            row = (y - offset) // cell_size
+        if board_left <= x < board_left + cell_size * width and board_top <= y < board_top + cell_size * height:
+            col = (x - board_left) // cell_size
+            row = (y - board_top) // cell_size
             return int(row), int(col)
         return None, None
 
-    run = True
-
-    while run:
+    while scene == "game":
         for event in pygame.event.get():
+            scheduler.handle_event(event)
             if event.type == pygame.QUIT:
+                thinker.cancel()
+                log_game(mode, state)
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 click_sound.play()
-                main_menu()
-            if game_over:
+                thinker.cancel()
+                log_game(mode, state)
+                switch_scene("menu")
+                return
+            if event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL:
+                if event.key == pygame.K_z:
+                    click_sound.play()
+                    undo_move()
+                elif event.key == pygame.K_y:
+                    click_sound.play()
+                    redo_move()
+            if state.game_over:
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                     # Reset game
                     click_sound.play()
-                    markers = [[0 for _ in range(3)] for _ in range(3)]
-                    winner = 0
-                    game_over = False
-                    winner_line = None
-                    player = 1
+                    log_game(mode, state)
+                    state = engine.new_game(mode)
+                    redo_moves.clear()
+                    animator.cancel()
+                    scheduler.invalidate()
             else:
-                if not game_over and ((play_with_bot and player == 1) or not play_with_bot):
+                if (play_with_bot and state.player == engine.X) or not play_with_bot:
                     if event.type == pygame.MOUSEBUTTONDOWN and not clicked:
                         clicked = True
                     if event.type == pygame.MOUSEBUTTONUP and clicked:
                         clicked = False
                         pos = pygame.mouse.get_pos()
                         row, col = get_cell_from_click(pos)
-                        if row is not None and col is not None and markers[row][col] == 0:
+                        if row is not None and col is not None and state.cell(row * width + col) == 0:
                             click_sound.play()
-                            markers[row][col] = player
-                            check_winner()
-                            player *= -1
-
-                            if not game_over and play_with_bot and player == -1:
-                                pygame.time.set_timer(pygame.USEREVENT, 1000)
-
-        # Bot reaction move
-        if play_with_bot and player == -1 and not game_over:
-            if event.type == pygame.USEREVENT:
-                pygame.time.set_timer(pygame.USEREVENT, 0)  # Turn off the timer
-                bot_move()
-                check_winner()
-                player *= -1
-
-        screen.fill(bg_color)
-        draw_grid()
-        draw_xo()
-        draw_players_score()
-
-        if game_over:
-            draw_winner_text(winner)
-            if winner_line:
-                highlight_winner_line(winner_line)
-
-        pygame.display.flip()
+                            redo_moves.clear()
+                            profiler.mark("events")
+                            state.apply_move(row * width + col)
+                            profiler.mark("move")
+                            update_score()
+                            invalidate_move(row * width + col)
+                            animate_move(row * width + col)
+        profiler.mark("events")
+
+        # Bot reaction move, computed in the background so the window stays responsive
+        if play_with_bot and state.player == engine.O and not state.game_over:
+            if not thinker.thinking:
+                thinker.start(bot_move, state, 1000)
+            move = thinker.poll()
+            if move is not None:
+                profiler.mark("bot")
+                state.apply_move(move)
+                profiler.mark("move")
+                update_score()
+                invalidate_move(move)
+                animate_move(move)
+        profiler.mark("bot")
+
+        # Advance the animations by the time the previous frame took
+        for rect in animator.update(frame_ms):
+            scheduler.invalidate(rect)
+        profiler.mark("animation")
+
+        if scheduler.needs_redraw:
+            draw_grid()
+            draw_xo()
+            draw_players_score()
+
+            if state.game_over:
+                draw_winner_text(state.winner)
+                if state.winner_line:
+                    highlight_winner_line(state.winner_line)
+        profiler.mark("draw")
+
+        scheduler.present()
+        frame_ms = scheduler.tick()
 
 def run_game_mode_3moves(theme, play_with_bot=False):
 
@@ -651,7 +768,6 @@ def run_game_mode_3moves(theme, play_with_bot=False):
     grid_size = 500
     offset = (screen_width - grid_size) // 2
     cell_size = grid_size // 3
-    font = pygame.font.Font(None, 40)
 
     # Theme Colors
     bg_color = theme["background_color"]
@@ -662,24 +778,34 @@ def run_game_mode_3moves(theme, play_with_bot=False):
     highlight_color = theme["highlight_color"]
 
 
-    # Initialize the markers and lists
-    markers = [[0 for _ in range(3)] for _ in range(3)]
-    x_list = []
-    o_list = []
+    # Initialize the game state
+    state = engine.ThreeMovesState()
+    bot_move = bots.get_bot("3moves", bot_difficulty, bot_think_ms, bot_workers)
+    thinker = BotThinker()
+    scheduler = FrameScheduler(fps_cap, "3moves")
+    animator = Animator()
+
+    # Screen areas redrawn after a move: old marks fade and vanish anywhere on the board
+    board_rect = pygame.Rect(offset, offset, grid_size, grid_size)
+    status_rect = pygame.Rect(0, grid_size + offset, screen_width, screen_height - grid_size - offset)
     clicked = False
-    player = 1
     player1_score = 0
     player2_score = 0
-    game_over = False
-    winner = 0
-    winner_line = None
-
-    def draw_grid():
-        screen.fill(bg_color)
+    redo_moves = []  # Moves taken back with Ctrl+Z, the next one to redo last
+    placed_cell = None  # Cell of the last mark placed, grows in while "place" runs
+    frame_ms = 0
+
+    def build_board():
+        # Background and grid lines, rendered once per theme
+        surface = pygame.Surface((screen_width, screen_height))
+        surface.fill(bg_color)
         for x in range(1, 3):
-            pygame.draw.line(screen, grid_color, (x * cell_size + offset, offset), (x * cell_size + offset, grid_size + offset), 6)
-            pygame.draw.line(screen, grid_color, (offset, x * cell_size + offset), (grid_size + offset, x * cell_size + offset), 6)
+            pygame.draw.line(surface, grid_color, (x * cell_size + offset, offset), (x * cell_size + offset, grid_size + offset), 6)
+            pygame.draw.line(surface, grid_color, (offset, x * cell_size + offset), (grid_size + offset, x * cell_size + offset), 6)
+        return surface.convert()
 
+    def draw_grid():
+        screen.blit(sprites.cached("3moves board", build_board), (0, 0))
 
     def draw_xo():
         top_shift = round(cell_size * 0.15)
@@ -688,113 +814,97 @@ def run_game_mode_3moves(theme, play_with_bot=False):
             for col in range(3):
                 x_pos = col * cell_size + offset
                 y_pos = row * cell_size + offset
-                if markers[row][col] == 1:
-                    color = x_color if (row, col) not in x_list[:1] or len(x_list) < 3 else '#808080'
-                    pygame.draw.line(screen, color, (x_pos + top_shift, y_pos + top_shift), (x_pos + bottom_shift, y_pos + bottom_shift), 8)
-                    pygame.draw.line(screen, color, (x_pos + top_shift, y_pos + bottom_shift), (x_pos + bottom_shift, y_pos + top_shift), 8)
-                elif markers[row][col] == -1:
-                    color = o_color if (row, col) not in o_list[:1] or len(o_list) < 3 else '#808080'
-                    pygame.draw.circle(screen, color, (x_pos + cell_size // 2, y_pos + cell_size // 2), (cell_size // 2) - 20, 10)
+                index = row * 3 + col
+                marker = state.cell(index)
+                scale = animator.value("place", 1.0) if index == placed_cell else 1.0
+                if marker == engine.X:
+                    color = x_color if index != state.expiring_cell(engine.X) else '#808080'
+                    sprites.blit_scaled(screen, sprites.x_sprite(cell_size, color, top_shift, bottom_shift, 8), (x_pos, y_pos), scale)
+                elif marker == engine.O:
+                    color = o_color if index != state.expiring_cell(engine.O) else '#808080'
+                    sprites.blit_scaled(screen, sprites.o_sprite(cell_size, color, (cell_size // 2) - 20, 10), (x_pos, y_pos), scale)
 
 
     def draw_players_score():
-        p1_font = pygame.font.SysFont(None, 40)
         p1_color = theme["p1_color"]
-        p2_font = pygame.font.SysFont(None, 40)
         p2_color = theme["p2_color"]
-        if player == -1:
-            p1_font, p2_font = p2_font, p1_font
+        if state.player == engine.O:
             p1_colour, p2_colour = p2_color, p1_color
 
-        p1_img = p1_font.render('Player X: ' + str(player1_score), True, p1_color)
+        p1_img = render_text('Player X: ' + str(player1_score), p1_color, 40)
         p1_rect = p1_img.get_rect(center=(screen_width // 3, grid_size + offset * 2))
         screen.blit(p1_img, p1_rect)
 
-        p2_img = p2_font.render('Player O: ' + str(player2_score), True, p2_color)
+        p2_img = render_text('Player O: ' + str(player2_score), p2_color, 40)
         p2_rect = p2_img.get_rect(center=(screen_width - screen_width // 3, grid_size + offset * 2))
         screen.blit(p2_img, p2_rect)
 
-        esc_font = pygame.font.SysFont(None, 30)
-        esc_img = esc_font.render("Esc - menu", True, font_color)
+        esc_img = render_text("Esc - menu", font_color, 30)
         ecs_rect = esc_img.get_rect(center=(60, 20))
         screen.blit(esc_img, ecs_rect)
 
+        undo_img = render_text("Ctrl+Z/Y - undo/redo", font_color, 30)
+        undo_rect = undo_img.get_rect(center=(screen_width - 115, 20))
+        screen.blit(undo_img, undo_rect)
 
-    def check_winner():
-        nonlocal winner, game_over, player1_score, player2_score, winner_line
-
-        # Check rows
-        for row in range(3):
-            if sum(markers[row]) == 3:
-                winner = 1
-                player1_score += 1
-                game_over = True
-                winner_line = [(row, 0), (row, 1), (row, 2)]
-                return
-            elif sum(markers[row]) == -3:
-                winner = 2
-                player2_score += 1
-                game_over = True
-                winner_line = [(row, 0), (row, 1), (row, 2)]
-                return
-
-        # Check columns
-        for col in range(3):
-            col_sum = markers[0][col] + markers[1][col] + markers[2][col]
-            if col_sum == 3:
-                winner = 1
-                player1_score += 1
-                game_over = True
-                winner_line = [(0, col), (1, col), (2, col)]
-                return
-            elif col_sum == -3:
-                winner = 2
-                player2_score += 1
-                game_over = True
-                winner_line = [(0, col), (1, col), (2, col)]
-                return
-
-        # Check diagonals
-        diag1 = markers[0][0] + markers[1][1] + markers[2][2]
-        diag2 = markers[0][2] + markers[1][1] + markers[2][0]
 
-        if diag1 == 3:
-            winner = 1
-            player1_score += 1
-            game_over = True
-            winner_line = [(0, 0), (1, 1), (2, 2)]
-        elif diag1 == -3:
-            winner = 2
-            player2_score += 1
-            game_over = True
-            winner_line = [(0, 0), (1, 1), (2, 2)]
-        elif diag2 == 3:
-            winner = 1
+    def update_score():
+        nonlocal player1_score, player2_score
+        if state.winner == engine.X:
             player1_score += 1
-            game_over = True
-            winner_line = [(0, 2), (1, 1), (2, 0)]
-        elif diag2 == -3:
-            winner = 2
+        elif state.winner == engine.O:
             player2_score += 1
-            game_over = True
-            winner_line = [(0, 2), (1, 1), (2, 0)]
 
-        # Check for a tie
-        if all([marker for row in markers for marker in row]):
-            winner = -1
-            game_over = True
+    def undo_move():
+        # Take back the last move; against the bot, back to the player's previous turn
+        nonlocal player1_score, player2_score
+        thinker.cancel()
+        animator.cancel()
+        steps = 2 if play_with_bot and state.player == engine.X else 1
+        for _ in range(min(steps, len(state.history))):
+            if state.winner == engine.X:
+                player1_score -= 1
+            elif state.winner == engine.O:
+                player2_score -= 1
+            redo_moves.append(state.unmake_move())
+        scheduler.invalidate()
+
+    def redo_move():
+        # Play taken back moves again; against the bot, its reply comes back too
+        animator.cancel()
+        while redo_moves:
+            state.apply_move(redo_moves.pop())
+            update_score()
+            if not play_with_bot or state.player == engine.X or state.game_over:
+                break
+        scheduler.invalidate()
+
+    def invalidate_move():
+        if state.game_over:
+            scheduler.invalidate()
+            return
+        scheduler.invalidate(board_rect)
+        scheduler.invalidate(status_rect)
+
+    def animate_move(move):
+        # The new mark grows in; a winning move also draws its line across
+        nonlocal placed_cell
+        placed_cell = move
+        row, col = divmod(move, 3)
+        animator.start("place", 0.3, 1.0, PLACE_MS, ease_out_cubic, (col * cell_size + offset, row * cell_size + offset, cell_size, cell_size))
+        if state.winner_line:
+            animator.start("win line", 0.0, 1.0, WIN_LINE_MS, ease_out_cubic)
 
 
     def draw_winner_text(winner):
-        if winner == -1:
+        if winner == engine.TIE:
             win_text = 'Tie!'
         else:
-            win_text = f'Player {"X" if winner == 1 else "O"} wins!'
+            win_text = f'Player {"X" if winner == engine.X else "O"} wins!'
 
-        text = font.render(win_text, True, font_color)
+        text = render_text(win_text, font_color, 40)
         text_rect = text.get_rect(center=(screen_width // 2, grid_size + offset + ((screen_height - (grid_size + offset)) // 2)))
-        pa_font = pygame.font.SysFont(None, 60, bold=True, italic=True)
-        play_again_img = pa_font.render("Press SPACE to play again", True, font_color)
+        play_again_img = render_text("Press SPACE to play again", font_color, 60, bold=True, italic=True)
         play_again_rect = play_again_img.get_rect(center=(screen_width // 2, text_rect.bottom + offset))
         screen.blit(text, text_rect)
         screen.blit(play_again_img, play_again_rect)
@@ -804,166 +914,123 @@ def run_game_mode_3moves(theme, play_with_bot=False):
         if not winner_line:
             return
         # Start and end points based on the grid
-        start_pos = winner_line[0]
-        end_pos = winner_line[-1]
+        start_pos = divmod(winner_line[0], 3)
+        end_pos = divmod(winner_line[-1], 3)
 
-        # Convert grid positions to pixel positions
+        # Convert grid positions to pixel positions; the line grows from its start while animated
         start_px = (start_pos[1] * cell_size + cell_size // 2 + offset, start_pos[0] * cell_size + cell_size // 2 + offset)
         end_px = (end_pos[1] * cell_size + cell_size // 2 + offset, end_pos[0] * cell_size + cell_size // 2 + offset)
+        progress = animator.value("win line", 1.0)
+        end_px = (start_px[0] + (end_px[0] - start_px[0]) * progress, start_px[1] + (end_px[1] - start_px[1]) * progress)
 
         pygame.draw.line(screen, highlight_color, start_px, end_px, 10)
 
-    def bot_move():
-        # Function to simulate a move and check if it forms a winning line with the last 3 moves
-        def is_winning_move(r, c, player_marker):
-            # Place the move temporarily
-            temp_markers = [row[:] for row in markers]
-            temp_markers[r][c] = player_marker
-            # Remove the oldest move
-            if player_marker == 1:
-                if len(x_list) == 3:
-                    row, col = x_list[0]
-                    temp_markers[row][col] = 0
-            else:
-                if len(o_list) == 3:
-                    row, col = o_list[0]
-                    temp_markers[row][col] = 0
-
-            # Check rows, columns, and diagonals but only count the last 3 of the same marker
-            def check_line(segment):
-                count = 0
-                for mark in segment:
-                    if mark == player_marker:
-                        count += 1
-                        if count == 3:
-                            return True
-                    else:
-                        count = 0
-                return False
-
-            # Check row
-            if check_line(temp_markers[r]):
-                return True
-
-            # Check column
-            if check_line([temp_markers[i][c] for i in range(3)]):
-                return True
-
-            # Check diagonal (if applicable)
-            if r == c and check_line([temp_markers[i][i] for i in range(3)]):
-                return True
-
-            # Check anti-diagonal (if applicable)
-            if r + c == 2 and check_line([temp_markers[i][2 - i] for i in range(3)]):
-                return True
-
-            return False
-
-        # Try to find a winning move for the bot or block the opponent's winning move
-        for player_marker in [-1, 1]:
-            for row in range(3):
-                for col in range(3):
-                    if markers[row][col] == 0:
-                        if is_winning_move(row, col, player_marker):
-                            return row, col
-
-        # No winning or blocking move, choose a random empty cell
-        empty_cells = [(r, c) for r in range(3) for c in range(3) if markers[r][c] == 0]
-        if empty_cells:
-            row, col = random.choice(empty_cells)
-            return row, col
-
     def get_cell_from_click(pos):
         x, y = pos
-        if offset <= x <= offset + grid_size and offset <= y <= offset + grid_size:
-            col = (x - offset) // cell_size
-            row = (y - offset) // cell_size
+        if offset <= x < offset + grid_size and offset <= y < offset + grid_size:
+            col = min((x - offset) // cell_size, 2)
+            row = min((y - offset) // cell_size, 2)
             return int(row), int(col)
         return None, None
 
 
-    run = True
-
-    while run:
+    while scene == "game":
         for event in pygame.event.get():
+            scheduler.handle_event(event)
             if event.type == pygame.QUIT:
+                thinker.cancel()
+                log_game("3moves", state)
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 click_sound.play()
-                main_menu()
-            if game_over:
+                thinker.cancel()
+                log_game("3moves", state)
+                switch_scene("menu")
+                return
+            if event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL:
+                if event.key == pygame.K_z:
+                    click_sound.play()
+                    undo_move()
+                elif event.key == pygame.K_y:
+                    click_sound.play()
+                    redo_move()
+            if state.game_over:
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                     # Reset game
                     click_sound.play()
-                    markers = [[0 for _ in range(3)] for _ in range(3)]
-                    x_list = []
-                    o_list = []
-                    winner = 0
-                    game_over = False
-                    winner_line = None
-                    player = 1
+                    log_game("3moves", state)
+                    state = engine.ThreeMovesState()
+                    redo_moves.clear()
+                    animator.cancel()
+                    scheduler.invalidate()
             else:
-                if not game_over and ((play_with_bot and player == 1) or not play_with_bot):
+                if (play_with_bot and state.player == engine.X) or not play_with_bot:
                     if event.type == pygame.MOUSEBUTTONDOWN and not clicked:
                         clicked = True
                     if event.type == pygame.MOUSEBUTTONUP and clicked:
                         clicked = False
                         pos = pygame.mouse.get_pos()
                         row, col = get_cell_from_click(pos)
-                        if row is not None and col is not None and markers[row][col] == 0:
+                        if row is not None and col is not None and state.cell(row * 3 + col) == 0:
                             click_sound.play()
-                            markers[row][col] = player
-                            if player == 1:
-                                x_list.append((row, col))
-                                if len(x_list) == 4:
-                                    y_rem, x_rem = x_list.pop(0)
-                                    markers[y_rem][x_rem] = 0
-                            else:
-                                o_list.append((row, col))
-                                if len(o_list) == 4:
-                                    y_rem, x_rem = o_list.pop(0)
-                                    markers[y_rem][x_rem] = 0
-                            player *= -1
-                            check_winner()
-
-
-                            if not game_over and play_with_bot and player == -1:
-                                pygame.time.set_timer(pygame.USEREVENT, 1000)
-
-        # Bot reaction move
-        if play_with_bot and player == -1 and not game_over:
-            if event.type == pygame.USEREVENT:
-                pygame.time.set_timer(pygame.USEREVENT, 0)  # Turn off the timer
-                row, col = bot_move()
-                markers[row][col] = -1
-                o_list.append((row, col))
-                if len(o_list) == 4:
-                    y_rem, x_rem = o_list.pop(0)
-                    markers[y_rem][x_rem] = 0
-                check_winner()
-                player *= -1
-
-        screen.fill(bg_color)
-        draw_grid()
-        draw_xo()
-        draw_players_score()
-
-        if game_over:
-            draw_winner_text(winner)
-            if winner_line:
-                highlight_winner_line(winner_line)
-
-        pygame.display.flip()
-
-def run_game_mode_tetris(theme, play_with_bot=False):
+                            redo_moves.clear()
+                            profiler.mark("events")
+                            state.apply_move(row * 3 + col)
+                            profiler.mark("move")
+                            update_score()
+                            invalidate_move()
+                            animate_move(row * 3 + col)
+        profiler.mark("events")
+
+        # Bot reaction move, computed in the background so the window stays responsive
+        if play_with_bot and state.player == engine.O and not state.game_over:
+            if not thinker.thinking:
+                thinker.start(bot_move, state, 1000)
+            move = thinker.poll()
+            if move is not None:
+                profiler.mark("bot")
+                state.apply_move(move)
+                profiler.mark("move")
+                update_score()
+                invalidate_move()
+                animate_move(move)
+        profiler.mark("bot")
+
+        # Advance the animations by the time the previous frame took
+        for rect in animator.update(frame_ms):
+            scheduler.invalidate(rect)
+        profiler.mark("animation")
+
+        if scheduler.needs_redraw:
+            draw_grid()
+            draw_xo()
+            draw_players_score()
+
+            if state.game_over:
+                draw_winner_text(state.winner)
+                if state.winner_line:
+                    highlight_winner_line(state.winner_line)
+        profiler.mark("draw")
+
+        scheduler.present()
+        frame_ms = scheduler.tick()
+
+def run_game_mode_tetris(theme, play_with_bot=False, mode="tetris"):
 
     # Constants
     screen_width, screen_height = 600, 800
     grid_size = 500
     offset = (screen_width - grid_size) // 2
-    cell_size = grid_size // 3
-    font = pygame.font.Font(None, 40)
+
+    # Board of the mode; cells are sized so the longer side fills the grid area
+    state = engine.new_game(mode)
+    width, height = state.width, state.height
+    cell_size = grid_size // max(width, height)
+    board_left = offset + (grid_size - cell_size * width) // 2
+    board_top = offset + (grid_size - cell_size * height) // 2
+    line_width = max(2, cell_size // 20)
+    mark_width = max(2, cell_size // 16)
 
     # Theme Colors
     bg_color = theme["background_color"]
@@ -976,137 +1043,117 @@ def run_game_mode_tetris(theme, play_with_bot=False):
     screen = pygame.display.set_mode((screen_width, screen_height))
     pygame.display.set_caption('TicTacToe')
 
-    # Initialize the markers
-    markers = [[0 for _ in range(3)] for _ in range(3)]
+    bot_move = bots.get_bot(mode, bot_difficulty, bot_think_ms, bot_workers, book=True)
+    thinker = BotThinker()
+    scheduler = FrameScheduler(fps_cap, mode)
+    animator = Animator()
+
+    # Screen area below the board with the scores and the result
+    status_rect = pygame.Rect(0, grid_size + offset, screen_width, screen_height - grid_size - offset)
     clicked = False
-    player = 1
     player1_score, player2_score = 0, 0
-    game_over = False
-    winner = 0
-    winner_line = None  # To store the coordinates of the winning line
+    redo_moves = []  # Moves taken back with Ctrl+Z, the next one to redo last
 
     drop_in_progress = False
     drop_column = None
-    drop_row = None
-    drop_y = 0
-    drop_speed = 5
-    drop_frame_delay = 5
+    frame_ms = 0
+
+    def build_board():
+        # Background and grid lines, rendered once per theme
+        surface = pygame.Surface((screen_width, screen_height))
+        surface.fill(bg_color)
+        board_right = board_left + cell_size * width
+        board_bottom = board_top + cell_size * height
+        for col in range(1, width):
+            x = col * cell_size + board_left
+            pygame.draw.line(surface, grid_color, (x, board_top), (x, board_bottom), line_width)
+        for row in range(1, height):
+            y = row * cell_size + board_top
+            pygame.draw.line(surface, grid_color, (board_left, y), (board_right, y), line_width)
+        return surface.convert()
 
     def draw_grid():
-        screen.fill(bg_color)
-        for x in range(1, 3):
-            pygame.draw.line(screen, grid_color, (x * cell_size + offset, offset), (x * cell_size + offset, grid_size + offset), 8)
-            pygame.draw.line(screen, grid_color, (offset, x * cell_size + offset), (grid_size + offset, x * cell_size + offset), 8)
+        screen.blit(sprites.cached(f"{mode} board", build_board), (0, 0))
 
     def draw_xo():
-        top_shift = round(cell_size * 0.15)
-        bottom_shift = round(cell_size * 0.85)
-        for row in range(3):
-            for col in range(3):
-                x_pos = col * cell_size + offset
-                y_pos = row * cell_size + offset
-                if markers[row][col] == 1:
-                    pygame.draw.line(screen, x_color, (x_pos + top_shift, y_pos + top_shift), (x_pos + bottom_shift, y_pos + bottom_shift), 8)
-                    pygame.draw.line(screen, x_color, (x_pos + top_shift, y_pos + bottom_shift), (x_pos + bottom_shift, y_pos + top_shift), 8)
-                elif markers[row][col] == -1:
-                    pygame.draw.circle(screen, o_color, (x_pos + cell_size // 2, y_pos + cell_size // 2), (cell_size // 2) - 20, 10)
+        x_image = sprites.x_sprite(cell_size, x_color, round(cell_size * 0.15), round(cell_size * 0.85), line_width)
+        o_image = sprites.o_sprite(cell_size, o_color, round(cell_size * 0.38), mark_width)
+        for row in range(height):
+            for col in range(width):
+                x_pos = col * cell_size + board_left
+                y_pos = row * cell_size + board_top
+                marker = state.cell(row * width + col)
+                if marker == engine.X:
+                    screen.blit(x_image, (x_pos, y_pos))
+                elif marker == engine.O:
+                    screen.blit(o_image, (x_pos, y_pos))
 
     def draw_players_score():
-        p1_font = pygame.font.SysFont(None, 40)
         p1_color = theme["p1_color"]
-        p2_font = pygame.font.SysFont(None, 40)
         p2_color = theme["p2_color"]
-        if player == -1:
-            p1_font, p2_font = p2_font, p1_font
+        if state.player == engine.O:
             p1_color, p2_color = p2_color, p1_color
 
-        p1_img = p1_font.render('Player X: ' + str(player1_score), True, p1_color)
+        p1_img = render_text('Player X: ' + str(player1_score), p1_color, 40)
         p1_rect = p1_img.get_rect(center=(screen_width // 3, grid_size + offset * 2))
         screen.blit(p1_img, p1_rect)
 
-        p2_img = p2_font.render('Player O: ' + str(player2_score), True, p2_color)
+        p2_img = render_text('Player O: ' + str(player2_score), p2_color, 40)
         p2_rect = p2_img.get_rect(center=(screen_width - screen_width // 3, grid_size + offset * 2))
         screen.blit(p2_img, p2_rect)
 
-        esc_font = pygame.font.SysFont(None, 30)
-        esc_img = esc_font.render("Esc - menu", True, font_color)
+        esc_img = render_text("Esc - menu", font_color, 30)
         ecs_rect = esc_img.get_rect(center=(60, 20))
         screen.blit(esc_img, ecs_rect)
 
-    def check_winner():
-        nonlocal winner, game_over, player1_score, player2_score, winner_line
-
-        # Check rows
-        for row in range(3):
-            if sum(markers[row]) == 3:
-                winner = 1
-                player1_score += 1
-                game_over = True
-                winner_line = [(row, 0), (row, 2)]
-                return
-            elif sum(markers[row]) == -3:
-                winner = 2
-                player2_score += 1
-                game_over = True
-                winner_line = [(row, 0), (row, 2)]
-                return
-
-        # Check columns
-        for col in range(3):
-            col_sum = markers[0][col] + markers[1][col] + markers[2][col]
-            if col_sum == 3:
-                winner = 1
-                player1_score += 1
-                game_over = True
-                winner_line = [(0, col), (2, col)]
-                return
-            elif col_sum == -3:
-                winner = 2
-                player2_score += 1
-                game_over = True
-                winner_line = [(0, col), (2, col)]
-                return
-
-        # Check diagonals
-        diag1 = markers[0][0] + markers[1][1] + markers[2][2]
-        diag2 = markers[0][2] + markers[1][1] + markers[2][0]
+        undo_img = render_text("Ctrl+Z/Y - undo/redo", font_color, 30)
+        undo_rect = undo_img.get_rect(center=(screen_width - 115, 20))
+        screen.blit(undo_img, undo_rect)
 
-        if diag1 == 3:
-            winner = 1
-            player1_score += 1
-            game_over = True
-            winner_line = [(0, 0), (2, 2)]
-        elif diag1 == -3:
-            winner = 2
-            player2_score += 1
-            game_over = True
-            winner_line = [(0, 0), (2, 2)]
-        elif diag2 == 3:
-            winner = 1
+    def update_score():
+        nonlocal player1_score, player2_score
+        if state.winner == engine.X:
             player1_score += 1
-            game_over = True
-            winner_line = [(0, 2), (2, 0)]
-        elif diag2 == -3:
-            winner = 2
+        elif state.winner == engine.O:
             player2_score += 1
-            game_over = True
-            winner_line = [(0, 2), (2, 0)]
 
-        # Check for a tie
-        if all(marker != 0 for row in markers for marker in row) and winner == 0:
-            winner = -1
-            game_over = True
+    def undo_move():
+        # Take back the last move; against the bot, back to the player's previous turn
+        nonlocal player1_score, player2_score
+        thinker.cancel()
+        animator.cancel()
+        steps = 2 if play_with_bot and state.player == engine.X else 1
+        for _ in range(min(steps, len(state.history))):
+            if state.winner == engine.X:
+                player1_score -= 1
+            elif state.winner == engine.O:
+                player2_score -= 1
+            redo_moves.append(state.unmake_move())
+        scheduler.invalidate()
+
+    def redo_move():
+        # Play taken back moves again; against the bot, its reply comes back too
+        animator.cancel()
+        while redo_moves:
+            state.apply_move(redo_moves.pop())
+            update_score()
+            if not play_with_bot or state.player == engine.X or state.game_over:
+                break
+        scheduler.invalidate()
+
+    def column_rect(column):
+        # The falling mark only ever moves inside its column
+        return (column * cell_size + board_left, board_top, cell_size, cell_size * height)
 
     def draw_winner_text(winner):
-        if winner == -1:
+        if winner == engine.TIE:
             win_text = 'Tie!'
         else:
-            win_text = f'Player {"X" if winner == 1 else "O"} wins!'
+            win_text = f'Player {"X" if winner == engine.X else "O"} wins!'
 
-        text = font.render(win_text, True, font_color)
+        text = render_text(win_text, font_color, 40)
         text_rect = text.get_rect(center=(screen_width // 2, grid_size + offset + ((screen_height - (grid_size + offset)) // 2)))
-        pa_font = pygame.font.SysFont(None, 60, bold=True, italic=True)
-        play_again_img = pa_font.render("Press SPACE to play again", True, font_color)
+        play_again_img = render_text("Press SPACE to play again", font_color, 60, bold=True, italic=True)
         play_again_rect = play_again_img.get_rect(center=(screen_width // 2, text_rect.bottom + offset))
         screen.blit(text, text_rect)
         screen.blit(play_again_img, play_again_rect)
@@ -1116,160 +1163,126 @@ def run_game_mode_tetris(theme, play_with_bot=False):
         if not winner_line:
             return
         # Start and end points based on the grid
-        start_pos = winner_line[0]
-        end_pos = winner_line[1]
-
-        # Convert grid positions to pixel positions
-        start_px = (start_pos[1] * cell_size + cell_size // 2 + offset, start_pos[0] * cell_size + cell_size // 2 + offset)
-        end_px = (end_pos[1] * cell_size + cell_size // 2 + offset, end_pos[0] * cell_size + cell_size // 2 + offset)
-
-        pygame.draw.line(screen, highlight_color, start_px, end_px, 10)
-
-    def bot_move():
-        # Number of rows and columns in the Tic-tac-toe grid
-        rows, columns = 3, 3
-
-        # Check if placing a piece in a specific column can result in a win
-        def can_win_next(player_marker, column):
-            # Simulate dropping the piece in the given column
-            for row in range(rows-1, -1, -1):
-                if markers[row][column] == 0:
-                    markers[row][column] = player_marker
-                    # Check if this move wins the game
-                    if check_winner_simulated(markers, player_marker):
-                        markers[row][column] = 0
-                        return True
-                    markers[row][column] = 0
-                    break
-            return False
-
-        # Function to check if there's a winner on a simulated board
-        def check_winner_simulated(board, player_marker):
-            # Check rows
-            for row in range(rows):
-                if all(board[row][col] == player_marker for col in range(columns)):
-                    return True
-            # Check columns
-            for col in range(columns):
-                if all(board[row][col] == player_marker for row in range(rows)):
-                    return True
-            # Check diagonals
-            if all(board[i][i] == player_marker for i in range(rows)):
-                return True
-            if all(board[i][columns-1-i] == player_marker for i in range(rows)):
-                return True
+        start_pos = divmod(winner_line[0], width)
+        end_pos = divmod(winner_line[-1], width)
+
+        # Convert grid positions to pixel positions; the line grows from its start while animated
+        start_px = (start_pos[1] * cell_size + cell_size // 2 + board_left, start_pos[0] * cell_size + cell_size // 2 + board_top)
+        end_px = (end_pos[1] * cell_size + cell_size // 2 + board_left, end_pos[0] * cell_size + cell_size // 2 + board_top)
+        progress = animator.value("win line", 1.0)
+        end_px = (start_px[0] + (end_px[0] - start_px[0]) * progress, start_px[1] + (end_px[1] - start_px[1]) * progress)
+
+        pygame.draw.line(screen, highlight_color, start_px, end_px, mark_width)
+
+    def drop_piece(column):
+        # Start the fall of a mark into the column; the move is played once it lands
+        nonlocal drop_in_progress, drop_column
+        row = state.drop_row(column)
+        if row is None:
             return False
-
-        # Try to find a winning move for the bot
-        for col in range(columns):
-            if can_win_next(-1, col):
-                return col
-
-        # Try to block the opponent's winning move
-        for col in range(columns):
-            if can_win_next(1, col):
-                return col
-
-        # Prefer the center column if it's empty
-        center_column = columns // 2
-        if markers[0][center_column] == 0:
-            return center_column
-
-        # Choose a random column from the available ones
-        empty_columns = [col for col in range(columns) if markers[0][col] == 0]
-        return random.choice(empty_columns) if empty_columns else None
-
-    def drop_piece(column, player):
-        nonlocal drop_in_progress, drop_column, drop_row, drop_y
-        for row in reversed(range(3)):
-            if markers[row][column] == 0:
-                drop_in_progress = True
-                drop_column = column
-                drop_row = row
-                drop_y = 0
-                return True
-        return False
+        drop_in_progress = True
+        drop_column = column
+        animator.start("drop", 0, row * cell_size, DROP_MS * math.sqrt(row), ease_in_quad, column_rect(column), land_piece)
+        return True
+
+    def land_piece():
+        nonlocal drop_in_progress
+        profiler.mark("animation")
+        state.apply_move(drop_column)
+        profiler.mark("move")
+        drop_in_progress = False
+        update_score()
+        scheduler.invalidate(status_rect)
+        if state.game_over:
+            scheduler.invalidate()
+            if state.winner_line:
+                animator.start("win line", 0.0, 1.0, WIN_LINE_MS, ease_out_cubic)
 
 
     def draw_dropping_piece(column, y, player):
-        x_pos = column * cell_size + offset
-        if player == 1:
-            pygame.draw.line(screen, x_color, (x_pos + round(cell_size * 0.15), y + offset + round(cell_size * 0.15)),
-                             (x_pos + round(cell_size * 0.85), y + offset + round(cell_size * 0.85)), 8)
-            pygame.draw.line(screen, x_color, (x_pos + round(cell_size * 0.15), y + offset + round(cell_size * 0.85)),
-                             (x_pos + round(cell_size * 0.85), y + offset + round(cell_size * 0.15)), 8)
+        x_pos = column * cell_size + board_left
+        if player == engine.X:
+            image = sprites.x_sprite(cell_size, x_color, round(cell_size * 0.15), round(cell_size * 0.85), line_width)
         else:
-            pygame.draw.circle(screen, o_color, (column * cell_size + offset + (cell_size // 2), y + offset + (cell_size // 2)), cell_size * 0.4, 10)
-
-    run = True
-    frame_count = 0
+            image = sprites.o_sprite(cell_size, o_color, cell_size * 0.4, mark_width)
+        screen.blit(image, (x_pos, y + board_top))
 
-    while run:
+    while scene == "game":
         for event in pygame.event.get():
+            scheduler.handle_event(event)
             if event.type == pygame.QUIT:
+                thinker.cancel()
+                log_game(mode, state)
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 click_sound.play()
-                main_menu()
-            if game_over:
+                thinker.cancel()
+                log_game(mode, state)
+                switch_scene("menu")
+                return
+            if event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL and not drop_in_progress:
+                if event.key == pygame.K_z:
+                    click_sound.play()
+                    undo_move()
+                elif event.key == pygame.K_y:
+                    click_sound.play()
+                    redo_move()
+            if state.game_over:
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                     # Reset game
                     click_sound.play()
-                    markers = [[0 for _ in range(3)] for _ in range(3)]
-                    winner = 0
-                    game_over = False
-                    winner_line = None
-                    player = 1
+                    log_game(mode, state)
+                    state = engine.new_game(mode)
+                    redo_moves.clear()
+                    animator.cancel()
+                    scheduler.invalidate()
             else:
-                if not game_over and ((play_with_bot and player == 1) or not play_with_bot) and not drop_in_progress:
+                if ((play_with_bot and state.player == engine.X) or not play_with_bot) and not drop_in_progress:
                     if event.type == pygame.MOUSEBUTTONDOWN and not clicked:
                         clicked = True
                     if event.type == pygame.MOUSEBUTTONUP and clicked:
                         clicked = False
-                        row, col = pygame.mouse.get_pos()
-                        if (row > grid_size + offset or row < offset) or (col > grid_size + offset or col < offset):
+                        x, y = pygame.mouse.get_pos()
+                        if not (board_left <= x < board_left + cell_size * width and board_top <= y < board_top + cell_size * height):
                             continue
-                        cell_row = (row - offset) // cell_size
-                        if drop_piece(cell_row, player):
+                        column = (x - board_left) // cell_size
+                        if drop_piece(column):
                             click_sound.play()
-
-                            if not game_over and play_with_bot and player == 1:
-                                pygame.time.set_timer(pygame.USEREVENT, 1000)
-
-        if drop_in_progress:
-            if frame_count % drop_frame_delay == 0:
-                if drop_y < (drop_row * cell_size):
-                    drop_y += drop_speed
-                else:
-                    markers[drop_row][drop_column] = player
-                    player *= -1
-                    drop_in_progress = False
-                    check_winner()
-
-        # Bot reaction move
-        if play_with_bot and player == -1 and not game_over and not drop_in_progress:
-            if event.type == pygame.USEREVENT:
-                pygame.time.set_timer(pygame.USEREVENT, 0)  # Turn off the timer
-                drop_piece(bot_move(), player)
-                check_winner()
-
-        screen.fill(bg_color)
-        draw_grid()
-        draw_xo()
-        draw_players_score()
-
-        if drop_in_progress:
-            draw_dropping_piece(drop_column, drop_y, player)
-
-        if game_over:
-            draw_winner_text(winner)
-            if winner_line:
-                highlight_winner_line(winner_line)
-
-        pygame.display.flip()
-        frame_count += 1
-        frame_count %= 10000
+                            redo_moves.clear()
+        profiler.mark("events")
+
+        # Advance the animations by the time the previous frame took; a
+        # falling mark lands, and its move is played, when its fall ends
+        for rect in animator.update(frame_ms):
+            scheduler.invalidate(rect)
+        profiler.mark("animation")
+
+        # Bot reaction move, computed in the background so the window stays responsive
+        if play_with_bot and state.player == engine.O and not state.game_over and not drop_in_progress:
+            if not thinker.thinking:
+                thinker.start(bot_move, state, 1000)
+            move = thinker.poll()
+            if move is not None:
+                drop_piece(move)
+        profiler.mark("bot")
+
+        if scheduler.needs_redraw:
+            draw_grid()
+            draw_xo()
+            draw_players_score()
+
+            if drop_in_progress:
+                draw_dropping_piece(drop_column, animator.value("drop", 0), state.player)
+
+            if state.game_over:
+                draw_winner_text(state.winner)
+                if state.winner_line:
+                    highlight_winner_line(state.winner_line)
+        profiler.mark("draw")
+
+        scheduler.present()
+        frame_ms = scheduler.tick()
 
 def run_game_mode_ultimate(theme, play_with_bot=False):
 
@@ -1279,7 +1292,6 @@ def run_game_mode_ultimate(theme, play_with_bot=False):
     small_grid_size = cell_size * 3
     big_grid_size = small_grid_size * 3
     offset = (screen_width - big_grid_size) // 2
-    font = pygame.font.Font(None, 40)
 
     # Theme Colors
     bg_color = theme["background_color"]
@@ -1289,347 +1301,287 @@ def run_game_mode_ultimate(theme, play_with_bot=False):
     o_color = theme["o_color"]
     highlight_color = theme["highlight_color"]
 
-    # Initialize the markers
-    markers = [[[[0 for _ in range(3)] for _ in range(3)] for _ in range(3)] for _ in range(3)]
-    big_markers = [[0 for _ in range(3)] for _ in range(3)]
+    # Initialize the game state
+    state = engine.UltimateState()
+    bot_move = bots.get_bot("ultimate", bot_difficulty, bot_think_ms, bot_workers, book=True)
+    thinker = BotThinker()
+    scheduler = FrameScheduler(fps_cap, "ultimate")
+    animator = Animator()
+
+    # Screen areas redrawn after a move: the active board highlight moves across the big board
+    board_rect = pygame.Rect(offset, offset, big_grid_size, big_grid_size)
+    status_rect = pygame.Rect(0, big_grid_size + offset, screen_width, screen_height - big_grid_size - offset)
     clicked = False
-    player = 1
     player1_score, player2_score = 0, 0
-    game_over = False
-    active_board = None
-    winner = 0
-
-    def draw_grid():
-        screen.fill(bg_color)
+    redo_moves = []  # Moves taken back with Ctrl+Z, the next one to redo last
+    placed_move = None  # Cell of the last mark placed, grows in while "place" runs
+    frame_ms = 0
+
+    def build_board():
+        # Background and grid lines, rendered once per theme
+        surface = pygame.Surface((screen_width, screen_height))
+        surface.fill(bg_color)
         # Draw the big grid
         for x in range(1, 3):
-            pygame.draw.line(screen, grid_color, (x * small_grid_size + offset, offset), (x * small_grid_size + offset, big_grid_size + offset), 8)
-            pygame.draw.line(screen, grid_color, (offset, x * small_grid_size + offset), (big_grid_size + offset, x * small_grid_size + offset), 8)
+            pygame.draw.line(surface, grid_color, (x * small_grid_size + offset, offset), (x * small_grid_size + offset, big_grid_size + offset), 8)
+            pygame.draw.line(surface, grid_color, (offset, x * small_grid_size + offset), (big_grid_size + offset, x * small_grid_size + offset), 8)
         # Draw the small grids
         for big_row in range(3):
             for big_col in range(3):
                 for x in range(1, 3):
-                    pygame.draw.line(screen, grid_color, (x * cell_size + big_col * small_grid_size + offset, big_row * small_grid_size + offset),
+                    pygame.draw.line(surface, grid_color, (x * cell_size + big_col * small_grid_size + offset, big_row * small_grid_size + offset),
                                      (x * cell_size + big_col * small_grid_size + offset, (big_row + 1) * small_grid_size + offset), 4)
-                    pygame.draw.line(screen, grid_color, (big_col * small_grid_size + offset, x * cell_size + big_row * small_grid_size + offset),
+                    pygame.draw.line(surface, grid_color, (big_col * small_grid_size + offset, x * cell_size + big_row * small_grid_size + offset),
                                      ((big_col + 1) * small_grid_size + offset, x * cell_size + big_row * small_grid_size + offset), 4)
+        return surface.convert()
+
+    def draw_grid():
+        screen.blit(sprites.cached("ultimate board", build_board), (0, 0))
 
     def draw_xo():
+        x_image = sprites.x_sprite(cell_size, x_color, 10, cell_size - 10, 6)
+        o_image = sprites.o_sprite(cell_size, o_color, (cell_size // 2) - 10, 6)
         for big_row in range(3):
             for big_col in range(3):
                 for small_row in range(3):
                     for small_col in range(3):
-                        marker = markers[big_row][big_col][small_row][small_col]
+                        move = (big_row * 3 + big_col) * 9 + small_row * 3 + small_col
+                        marker = state.cell(move)
                         x_pos = big_col * small_grid_size + small_col * cell_size + offset
                         y_pos = big_row * small_grid_size + small_row * cell_size + offset
-                        if marker == 1:
-                            pygame.draw.line(screen, x_color, (x_pos + 10, y_pos + 10), (x_pos + cell_size - 10, y_pos + cell_size - 10), 6)
-                            pygame.draw.line(screen, x_color, (x_pos + 10, y_pos + cell_size - 10), (x_pos + cell_size - 10, y_pos + 10), 6)
-                        elif marker == -1:
-                            pygame.draw.circle(screen, o_color, (x_pos + cell_size // 2, y_pos + cell_size // 2), (cell_size // 2) - 10, 6)
+                        scale = animator.value("place", 1.0) if move == placed_move else 1.0
+                        if marker == engine.X:
+                            sprites.blit_scaled(screen, x_image, (x_pos, y_pos), scale)
+                        elif marker == engine.O:
+                            sprites.blit_scaled(screen, o_image, (x_pos, y_pos), scale)
 
     def draw_big_xo():
+        x_image = sprites.x_sprite(small_grid_size, x_color, 10, small_grid_size - 10, 15)
+        o_image = sprites.o_sprite(small_grid_size, o_color, (small_grid_size // 2) - 10, 15)
         for row in range(3):
             for col in range(3):
-                marker = big_markers[row][col]
+                marker = state.big_cell(row * 3 + col)
                 x_pos = col * small_grid_size + offset
                 y_pos = row * small_grid_size + offset
-                if marker == 1:
-                    pygame.draw.line(screen, x_color, (x_pos + 10, y_pos + 10), (x_pos + small_grid_size - 10, y_pos + small_grid_size - 10), 15)
-                    pygame.draw.line(screen, x_color, (x_pos + 10, y_pos + small_grid_size - 10), (x_pos + small_grid_size - 10, y_pos + 10), 15)
-                elif marker == -1:
-                    pygame.draw.circle(screen, o_color, (x_pos + small_grid_size // 2, y_pos + small_grid_size // 2), (small_grid_size // 2) - 10, 15)
+                if marker == engine.X:
+                    screen.blit(x_image, (x_pos, y_pos))
+                elif marker == engine.O:
+                    screen.blit(o_image, (x_pos, y_pos))
 
     def draw_players_score():
-        p1_font = pygame.font.SysFont(None, 40)
         p1_color = theme["p1_color"]
-        p2_font = pygame.font.SysFont(None, 40)
         p2_color = theme["p2_color"]
-        if player == -1:
-            p1_font, p2_font = p2_font, p1_font
+        if state.player == engine.O:
             p1_color, p2_color = p2_color, p1_color
 
-        p1_img = p1_font.render('Player X: ' + str(player1_score), True, p1_color)
+        p1_img = render_text('Player X: ' + str(player1_score), p1_color, 40)
         p1_rect = p1_img.get_rect(center=(screen_width // 3, big_grid_size + offset * 2))
         screen.blit(p1_img, p1_rect)
 
-        p2_img = p2_font.render('Player O: ' + str(player2_score), True, p2_color)
+        p2_img = render_text('Player O: ' + str(player2_score), p2_color, 40)
         p2_rect = p2_img.get_rect(center=(screen_width - screen_width // 3, big_grid_size + offset * 2))
         screen.blit(p2_img, p2_rect)
 
-        esc_font = pygame.font.SysFont(None, 30)
-        esc_img = esc_font.render("Esc - menu", True, font_color)
+        esc_img = render_text("Esc - menu", font_color, 30)
         ecs_rect = esc_img.get_rect(center=(60, 15))
         screen.blit(esc_img, ecs_rect)
 
-    def check_small_winner(big_row, big_col):
-        small_board = markers[big_row][big_col]
-        for row in range(3):
-            if sum(small_board[row]) == 3:
-                big_markers[big_row][big_col] = 1
-                return True
-            elif sum(small_board[row]) == -3:
-                big_markers[big_row][big_col] = -1
-                return True
-        for col in range(3):
-            if small_board[0][col] + small_board[1][col] + small_board[2][col] == 3:
-                big_markers[big_row][big_col] = 1
-                return True
-            elif small_board[0][col] + small_board[1][col] + small_board[2][col] == -3:
-                big_markers[big_row][big_col] = -1
-                return True
-        if small_board[0][0] + small_board[1][1] + small_board[2][2] == 3 or small_board[0][2] + small_board[1][1] + small_board[2][0] == 3:
-            big_markers[big_row][big_col] = 1
-            return True
-        if small_board[0][0] + small_board[1][1] + small_board[2][2] == -3 or small_board[0][2] + small_board[1][1] + small_board[2][0] == -3:
-            big_markers[big_row][big_col] = -1
-            return True
-        if all([marker for row in small_board for marker in row]):
-            big_markers[big_row][big_col] = -2
-            return False
+        undo_img = render_text("Ctrl+Z/Y - undo/redo", font_color, 30)
+        undo_rect = undo_img.get_rect(center=(screen_width - 115, 15))
+        screen.blit(undo_img, undo_rect)
 
-    def check_big_winner():
+    def update_score():
         nonlocal player1_score, player2_score
-        for row in range(3):
-            if sum(big_markers[row]) == 3:
-                player1_score += 1
-                return 1
-            elif sum(big_markers[row]) == -3:
-                player2_score += 1
-                return -1
-        for col in range(3):
-            if big_markers[0][col] + big_markers[1][col] + big_markers[2][col] == 3:
-                player1_score += 1
-                return 1
-            elif big_markers[0][col] + big_markers[1][col] + big_markers[2][col] == -3:
-                player2_score += 1
-                return -1
-        if big_markers[0][0] + big_markers[1][1] + big_markers[2][2] == 3 or big_markers[0][2] + big_markers[1][1] + big_markers[2][0] == 3:
+        if state.winner == engine.X:
             player1_score += 1
-            return 1
-        if big_markers[0][0] + big_markers[1][1] + big_markers[2][2] == -3 or big_markers[0][2] + big_markers[1][1] + big_markers[2][0] == -3:
+        elif state.winner == engine.O:
             player2_score += 1
-            return -1
-        if all([marker != 0 for row in big_markers for marker in row]):
-            return -2
-        return 0
+
+    def undo_move():
+        # Take back the last move; against the bot, back to the player's previous turn
+        nonlocal player1_score, player2_score
+        thinker.cancel()
+        animator.cancel()
+        steps = 2 if play_with_bot and state.player == engine.X else 1
+        for _ in range(min(steps, len(state.history))):
+            if state.winner == engine.X:
+                player1_score -= 1
+            elif state.winner == engine.O:
+                player2_score -= 1
+            redo_moves.append(state.unmake_move())
+        scheduler.invalidate()
+
+    def redo_move():
+        # Play taken back moves again; against the bot, its reply comes back too
+        animator.cancel()
+        while redo_moves:
+            state.apply_move(redo_moves.pop())
+            update_score()
+            if not play_with_bot or state.player == engine.X or state.game_over:
+                break
+        scheduler.invalidate()
+
+    def invalidate_move():
+        if state.game_over:
+            scheduler.invalidate()
+            return
+        scheduler.invalidate(board_rect)
+        scheduler.invalidate(status_rect)
+
+    def animate_move(move):
+        # The new mark grows in; a winning move also draws its line across the big board
+        nonlocal placed_move
+        placed_move = move
+        big_row, big_col = divmod(move // 9, 3)
+        small_row, small_col = divmod(move % 9, 3)
+        x_pos = big_col * small_grid_size + small_col * cell_size + offset
+        y_pos = big_row * small_grid_size + small_row * cell_size + offset
+        animator.start("place", 0.3, 1.0, PLACE_MS, ease_out_cubic, (x_pos, y_pos, cell_size, cell_size))
+        if state.winner_line:
+            animator.start("win line", 0.0, 1.0, WIN_LINE_MS, ease_out_cubic)
 
     def draw_winner_text(winner):
-        if winner == -2:
+        if winner == engine.TIE:
             win_text = 'Tie!'
         else:
-            win_text = f'Player {"X" if winner == 1 else "O"} wins!'
+            win_text = f'Player {"X" if winner == engine.X else "O"} wins!'
 
-        text = font.render(win_text, True, font_color)
+        text = render_text(win_text, font_color, 40)
         text_rect = text.get_rect(center=(screen_width // 2, big_grid_size + ((screen_height - big_grid_size) // 2)))
-        pa_font = pygame.font.SysFont(None, 60, bold=True, italic=True)
-        play_again_img = pa_font.render("Press SPACE to play again", True, font_color)
+        play_again_img = render_text("Press SPACE to play again", font_color, 60, bold=True, italic=True)
         play_again_rect = play_again_img.get_rect(center=(screen_width // 2, text_rect.bottom + (screen_height - text_rect.bottom) // 2))
         screen.blit(text, text_rect)
         screen.blit(play_again_img, play_again_rect)
 
     def draw_active_board():
-        if active_board is not None and big_markers[active_board[0]][active_board[1]] == 0:
-            big_row, big_col = active_board
+        open_boards = state.open_boards()
+        if not state.game_over and len(open_boards) == 1:
+            big_row, big_col = divmod(open_boards[0], 3)
             x_pos = big_col * small_grid_size + offset
             y_pos = big_row * small_grid_size + offset
             pygame.draw.rect(screen, highlight_color, (x_pos, y_pos, small_grid_size, small_grid_size), 8)
 
-    def bot_move():
-        def check_small_winner(sim_markers, big_row, big_col, mark):
-            # Check if a move results in a win in a small board
-            for row in range(3):
-                if all(sim_markers[big_row][big_col][row][col] == mark for col in range(3)):
-                    return True
-                if all(sim_markers[big_row][big_col][col][row] == mark for col in range(3)):
-                    return True
-            if all(sim_markers[big_row][big_col][i][i] == mark for i in range(3)):
-                return True
-            if all(sim_markers[big_row][big_col][i][2 - i] == mark for i in range(3)):
-                return True
-            return False
-
-        def find_winning_move():
-            # Check if there's a move that leads to an immediate small board win on the active board
-            big_row, big_col = active_board
-            if big_markers[big_row][big_col] == 0:
-                for small_row in range(3):
-                    for small_col in range(3):
-                        if markers[big_row][big_col][small_row][small_col] == 0:
-                            # Simulate the move
-                            markers[big_row][big_col][small_row][small_col] = player
-                            if check_small_winner(markers, big_row, big_col, player):
-                                markers[big_row][big_col][small_row][small_col] = 0
-                                return big_row, big_col, small_row, small_col
-                            # Undo the move
-                            markers[big_row][big_col][small_row][small_col] = 0
-            return None
-
-        def find_blocking_move():
-            # Check if the opponent has a winning move and block it on the active board
-            opponent = -player
-            big_row, big_col = active_board
-            if big_markers[big_row][big_col] == 0:
-                for small_row in range(3):
-                    for small_col in range(3):
-                        if markers[big_row][big_col][small_row][small_col] == 0:
-                            # Simulate the move for the opponent
-                            markers[big_row][big_col][small_row][small_col] = opponent
-                            if check_small_winner(markers, big_row, big_col, opponent):
-                                markers[big_row][big_col][small_row][small_col] = 0
-                                return big_row, big_col, small_row, small_col
-                            # Undo the move
-                            markers[big_row][big_col][small_row][small_col] = 0
-            return None
-
-        def strategic_move():
-            big_row, big_col = active_board
-            if big_markers[big_row][big_col] == 0:
-                # List of preferred moves: corners, then edges
-                preferred_moves = [(0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
-                random.shuffle(preferred_moves)
-                # Try to take a strategic move avoiding the center initially
-                for move in preferred_moves:
-                    small_row, small_col = move
-                    if markers[big_row][big_col][small_row][small_col] == 0:
-                        if not check_small_winner(markers, small_row, small_col, 1) and (small_col != big_col and small_row != big_row):
-                            return big_row, big_col, small_row, small_col
-
-                random.shuffle(preferred_moves)
-                for move in preferred_moves:
-                    small_row, small_col = move
-                    if markers[big_row][big_col][small_row][small_col] == 0:
-                        return big_row, big_col, small_row, small_col
-
-
-                # Consider the center if no other good move is found
-                center = (1, 1)
-                if markers[big_row][big_col][center[0]][center[1]] == 0:
-                    return big_row, big_col, center[0], center[1]
-
-                # If all strategic positions are taken, choose the first available move
-                for small_row in range(3):
-                    for small_col in range(3):
-                        if markers[big_row][big_col][small_row][small_col] == 0:
-                            return big_row, big_col, small_row, small_col
-
-            # Fallback if no strategic moves are possible
-            for br in range(3):
-                for bc in range(3):
-                    if big_markers[br][bc] == 0:
-                        for sr in range(3):
-                            for sc in range(3):
-                                if markers[br][bc][sr][sc] == 0:
-                                    return br, bc, sr, sc
-
-            return None
-
-        # Look for an immediate winning move
-        move = find_winning_move()
-        if move:
-            return move
-
-        # Look for a blocking move
-        move = find_blocking_move()
-        if move:
-            return move
-
-        # Otherwise, follow the strategic move advice
-        return strategic_move()
+    def highlight_winner_line(winner_line):
+        # Line across the centers of the won small boards
+        start_row, start_col = divmod(winner_line[0], 3)
+        end_row, end_col = divmod(winner_line[-1], 3)
+        start_px = (start_col * small_grid_size + small_grid_size // 2 + offset, start_row * small_grid_size + small_grid_size // 2 + offset)
+        end_px = (end_col * small_grid_size + small_grid_size // 2 + offset, end_row * small_grid_size + small_grid_size // 2 + offset)
+        progress = animator.value("win line", 1.0)
+        end_px = (start_px[0] + (end_px[0] - start_px[0]) * progress, start_px[1] + (end_px[1] - start_px[1]) * progress)
+        pygame.draw.line(screen, highlight_color, start_px, end_px, 10)
 
-    def get_active_board_from_click(pos):
-        nonlocal active_board
+    def get_move_from_click(pos):
         x, y = pos
-        if (x < offset or x > offset + big_grid_size) or (y < offset or y > offset + big_grid_size):
+        if (x < offset or x >= offset + big_grid_size) or (y < offset or y >= offset + big_grid_size):
             return None
         big_col = (x - offset) // small_grid_size
         big_row = (y - offset) // small_grid_size
+        small_col = (x - offset - big_col * small_grid_size) // cell_size
+        small_row = (y - offset - big_row * small_grid_size) // cell_size
+        return (big_row * 3 + big_col) * 9 + small_row * 3 + small_col
 
-        # Allow playing on any board if the active board is won or a tie
-        if active_board is None or big_markers[active_board[0]][active_board[1]] != 0:
-            return big_row, big_col
-        elif (big_row, big_col) == active_board:
-            return big_row, big_col
-        return None
-
-    def get_cell_from_click(pos, big_row, big_col):
-        x, y = pos
-        small_x = (x - offset - big_col * small_grid_size) // cell_size
-        small_y = (y - offset - big_row * small_grid_size) // cell_size
-        return small_y, small_x
-
-    run = True
-
-    while run:
+    while scene == "game":
         for event in pygame.event.get():
+            scheduler.handle_event(event)
             if event.type == pygame.QUIT:
+                thinker.cancel()
+                mcts.shutdown_executors()
+                log_game("ultimate", state)
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 click_sound.play()
-                main_menu()
-            if winner:
+                thinker.cancel()
+                mcts.shutdown_executors()
+                log_game("ultimate", state)
+                switch_scene("menu")
+                return
+            if event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL:
+                if event.key == pygame.K_z:
+                    click_sound.play()
+                    undo_move()
+                elif event.key == pygame.K_y:
+                    click_sound.play()
+                    redo_move()
+            if state.game_over:
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                     # Reset game
                     click_sound.play()
-                    markers = [[[[0 for _ in range(3)] for _ in range(3)] for _ in range(3)] for _ in range(3)]
-                    big_markers = [[0 for _ in range(3)] for _ in range(3)]
+                    log_game("ultimate", state)
+                    state = engine.UltimateState()
+                    redo_moves.clear()
+                    animator.cancel()
                     clicked = False
-                    player = 1
-                    game_over = False
-                    active_board = None
-                    winner = 0
+                    scheduler.invalidate()
             else:
-                if not game_over and ((play_with_bot and player == 1) or not play_with_bot):
+                if (play_with_bot and state.player == engine.X) or not play_with_bot:
                     if event.type == pygame.MOUSEBUTTONDOWN and not clicked:
                         clicked = True
                     if event.type == pygame.MOUSEBUTTONUP and clicked:
                         clicked = False
                         pos = pygame.mouse.get_pos()
-                        new_active_board = get_active_board_from_click(pos)
-                        if new_active_board is not None:
-                            big_row, big_col = new_active_board
-                            if big_markers[big_row][big_col] == 0:
-                                small_row, small_col = get_cell_from_click(pos, big_row, big_col)
-                                if markers[big_row][big_col][small_row][small_col] == 0:
-                                    click_sound.play()
-                                    markers[big_row][big_col][small_row][small_col] = player
-                                    player *= -1
-                                    check_small_winner(big_row, big_col)
-                                    winner = check_big_winner()
-                                    active_board = (small_row, small_col)
-                                    if not game_over and play_with_bot and player == -1:
-                                        pygame.time.set_timer(pygame.USEREVENT, 1000)
-                            else:
-                                active_board = None
-                        else:
-                            if active_board is None or big_markers[active_board[0]][active_board[1]] != 0:
-                                active_board = new_active_board
-
-
-
-        # Bot reaction move
-        if play_with_bot and player == -1 and not winner:
-            if event.type == pygame.USEREVENT:
-                pygame.time.set_timer(pygame.USEREVENT, 0)  # Turn off the timer
-                big_row, big_col, small_row, small_col = bot_move()
-                markers[big_row][big_col][small_row][small_col] = player
-                player *= -1
-                check_small_winner(big_row, big_col)
-                winner = check_big_winner()
-                active_board = (small_row, small_col)
-
-        screen.fill(bg_color)
-        draw_grid()
-        draw_xo()
-        draw_big_xo()
-        draw_players_score()
-        draw_active_board()
-
-        if winner:
-            draw_winner_text(winner)
-
-        pygame.display.flip()
+                        move = get_move_from_click(pos)
+                        # Clicks outside the board the player is sent to are ignored
+                        if move is not None and move in state.legal_moves():
+                            click_sound.play()
+                            redo_moves.clear()
+                            profiler.mark("events")
+                            state.apply_move(move)
+                            profiler.mark("move")
+                            update_score()
+                            invalidate_move()
+                            animate_move(move)
+        profiler.mark("events")
+
+        # Bot reaction move, computed in the background so the window stays responsive
+        if play_with_bot and state.player == engine.O and not state.game_over:
+            if not thinker.thinking:
+                thinker.start(bot_move, state, 1000)
+            move = thinker.poll()
+            if move is not None:
+                profiler.mark("bot")
+                state.apply_move(move)
+                profiler.mark("move")
+                update_score()
+                invalidate_move()
+                animate_move(move)
+        profiler.mark("bot")
+
+        # Advance the animations by the time the previous frame took
+        for rect in animator.update(frame_ms):
+            scheduler.invalidate(rect)
+        profiler.mark("animation")
+
+        if scheduler.needs_redraw:
+            draw_grid()
+            draw_xo()
+            draw_big_xo()
+            draw_players_score()
+            draw_active_board()
+
+            if state.game_over:
+                draw_winner_text(state.winner)
+                if state.winner_line:
+                    highlight_winner_line(state.winner_line)
+        profiler.mark("draw")
+
+        scheduler.present()
+        frame_ms = scheduler.tick()
+
+# Screen function of every scene
+SCENES = {
+    "menu": main_menu,
+    "settings": settings_menu,
+    "mode_select": game_mode_screen,
+    "game": run_selected_mode,
+}
+
+def run_scenes():
+    while True:
+        SCENES[scene]()
 
 # Start with the main menu
-main_menu()
\ No newline at end of file
+if __name__ == "__main__":
+    init_game()
+    run_scenes()
\ No newline at end of file
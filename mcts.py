@@ -0,0 +1,186 @@
+import math
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import engine
+
+# Monte Carlo Tree Search (UCT) bot for Ultimate mode.
+#
+# Every iteration walks down the tree picking children by UCB1, adds one new
+# node, finishes the game with random moves and credits the result to every
+# node on the path. The tree is kept between turns: on the next call the bot
+# finds the node for the current position under its previous choice and
+# keeps searching from there.
+#
+# With more than one worker the search is root-parallel: every extra worker
+# process grows its own independent tree for the same time budget, and the
+# visit counts of the root moves are summed before picking the move.
+
+EXPLORATION = math.sqrt(2)
+DEFAULT_THINK_MS = 500
+
+
+class Node:
+    __slots__ = ("move", "parent", "children", "untried", "wins", "visits", "player")
+
+    def __init__(self, move=None, parent=None, player=0):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = None  # Filled with the legal moves on the first visit
+        self.wins = 0.0      # From the point of view of `player`, who made `move`
+        self.visits = 0
+        self.player = player
+
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        best = None
+        best_score = -1.0
+        for child in self.children:
+            score = child.wins / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best = child
+                best_score = score
+        return best
+
+
+def playout(state, rng):
+    # Finish the game with random moves and return the winner
+    while not state.winner:
+        state.play(rng.choice(state.legal_moves()))
+    return state.winner
+
+
+def search(root, state, deadline, rng, stop=None):
+    # Run iterations from root (whose position is state) until the deadline
+    # or until the stop event is set
+    iterations = 0
+    while True:
+        node = root
+        sim = state.copy()
+
+        # Selection
+        while node.untried is not None and not node.untried and node.children:
+            node = node.select_child()
+            sim.play(node.move)
+
+        # Expansion
+        if node.untried is None:
+            node.untried = sim.legal_moves()
+            rng.shuffle(node.untried)
+        if node.untried:
+            move = node.untried.pop()
+            child = Node(move, node, sim.player)
+            node.children.append(child)
+            sim.play(move)
+            node = child
+
+        # Simulation and backpropagation
+        winner = playout(sim, rng)
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.wins += 1
+            elif winner == engine.TIE:
+                node.wins += 0.5
+            node = node.parent
+
+        iterations += 1
+        if iterations % 16 == 0 and (time.perf_counter() >= deadline or (stop and stop.is_set())):
+            return iterations
+
+
+def root_visits(state, think_ms, seed):
+    # Worker process entry point: search a fresh tree, return root move visits
+    root = Node(player=-state.player)
+    search(root, state, time.perf_counter() + think_ms / 1000, random.Random(seed))
+    return {child.move: child.visits for child in root.children}
+
+
+# Worker pools are shared by all bots and live until shutdown_executors(),
+# called when the player leaves Ultimate
+_executors = {}
+
+
+def get_executor(workers):
+    if workers not in _executors:
+        _executors[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _executors[workers]
+
+
+def shutdown_executors():
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
+
+
+class MCTSBot:
+    def __init__(self, think_ms=DEFAULT_THINK_MS, workers=1, seed=None):
+        self.think_ms = think_ms
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.stop_event = threading.Event()
+        self.root = None
+        self.root_state = None
+        self.last_iterations = 0
+
+    def reuse_root(self, state):
+        # Subtree of the previous search that matches the current position
+        if self.root is None:
+            return None
+        if self.root_state.key == state.key:
+            return self.root
+        for child in self.root.children:
+            sim = self.root_state.copy()
+            sim.play(child.move)
+            if sim.key == state.key:
+                child.parent = None
+                return child
+        return None
+
+    def start_workers(self, state):
+        # Futures of the extra worker trees; empty if running single-process
+        if self.workers <= 1:
+            return []
+        try:
+            executor = get_executor(self.workers - 1)
+            return [executor.submit(root_visits, state, self.think_ms, self.rng.getrandbits(32))
+                    for _ in range(self.workers - 1)]
+        except (OSError, NotImplementedError, BrokenProcessPool, RuntimeError):
+            # No usable process pool on this platform: keep searching alone
+            self.workers = 1
+            return []
+
+    def stop(self):
+        # Cut a running search short, e.g. when the player leaves the game
+        self.stop_event.set()
+
+    def __call__(self, state):
+        deadline = time.perf_counter() + self.think_ms / 1000
+        self.stop_event.clear()
+        futures = self.start_workers(state)
+        root = self.reuse_root(state) or Node(player=-state.player)
+        self.last_iterations = search(root, state, deadline, self.rng, self.stop_event)
+
+        visits = {child.move: child.visits for child in root.children}
+        for future in futures:
+            try:
+                for move, count in future.result().items():
+                    visits[move] = visits.get(move, 0) + count
+            except Exception:
+                # A failed or cancelled worker: keep searching alone
+                self.workers = 1
+        best_move = max(visits, key=visits.get)
+
+        # Keep the local subtree of the chosen move for the next turn
+        best = next((child for child in root.children if child.move == best_move), None)
+        self.root = best
+        self.root_state = None
+        if best is not None:
+            best.parent = None
+            self.root_state = state.copy()
+            self.root_state.play(best_move)
+        return best_move
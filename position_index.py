@@ -0,0 +1,347 @@
+import argparse
+import collections
+import functools
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+import engine
+import game_records
+from bitboard import SYMMETRIES, bit_indices
+from settings_store import config_dir
+from zobrist import ACTIVE, CELLS, SIDE, ULTIMATE_CELLS, queue_key
+
+# Index of logged games by position, for one mode.
+#
+# Every position reached in the logged games is counted under its canonical
+# key: the smallest Zobrist key of the position over the symmetries of its
+# board, so mirrored and rotated games add up. The index holds X's wins,
+# the draws, O's wins and the number of games for every key, and the bots
+# use it as an opening book.
+#
+# The index file is a hash table with open addressing, memory-mapped for
+# lookups: a lookup hashes the key to a slot and reads the slots from there
+# until it finds the key or an empty slot, without reading anything else of
+# the file. Positions are indexed up to a depth, so an index of millions of
+# games stays small enough to build in memory.
+#
+# Layout: header (magic, version, mode id, number of slots, number of
+# positions), then the slots: uint64 key and uint32 X wins, draws, O wins
+# and games (0 for an empty slot), all little-endian.
+#
+#   python -m position_index build ultimate [FILE ...]
+#   python -m position_index show ultimate 40 4
+
+MAGIC = b"TTTI"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQ")
+SLOT = struct.Struct("<QIIII")
+DEPTH = 20      # Plies indexed of every game
+MIN_GAMES = 10  # Games a book move must have been played in
+
+PositionStats = collections.namedtuple("PositionStats", "x_wins draws o_wins games")
+
+# Counts of a position while building, packed in one int: X wins, draws,
+# O wins and games in 32 bits each
+COUNT_BITS = 32
+COUNT_MASK = (1 << COUNT_BITS) - 1
+GAME = 1 << 3 * COUNT_BITS
+RESULT_COUNTS = {0: GAME, engine.X: GAME | 1, engine.TIE: GAME | 1 << COUNT_BITS, engine.O: GAME | 1 << 2 * COUNT_BITS}
+
+_indexes = {}
+
+
+def index_path(mode):
+    # The player's index of the mode, next to their game log
+    return os.path.join(config_dir(), f"{mode}.idx")
+
+
+@functools.lru_cache(maxsize=None)
+def board_symmetries(width, height, gravity=False):
+    # Cell permutations of the symmetries of a board, the identity first:
+    # with gravity only the mirror image, else the flips and, on a square
+    # board, the rotations too
+    def mirror(cell):
+        row, col = divmod(cell, width)
+        return row * width + width - 1 - col
+
+    def flip(cell):
+        row, col = divmod(cell, width)
+        return (height - 1 - row) * width + col
+
+    def turn(cell):
+        row, col = divmod(cell, width)
+        return col * width + width - 1 - row
+
+    cells = range(width * height)
+    if gravity:
+        return (tuple(cells), tuple(map(mirror, cells)))
+    if width != height:
+        return (tuple(cells), tuple(map(mirror, cells)), tuple(map(flip, cells)), tuple(mirror(flip(cell)) for cell in cells))
+    perms = []
+    for flipped in (False, True):
+        perm = [mirror(cell) if flipped else cell for cell in cells]
+        for _ in range(4):
+            perms.append(tuple(perm))
+            perm = [turn(cell) for cell in perm]
+    return tuple(perms)
+
+
+# Ultimate: every symmetry turns the big board and the small boards alike;
+# (cell permutation, board permutation with the free choice 9 kept)
+ULTIMATE_SYMMETRIES = tuple(
+    (tuple(perm[cell // 9] * 9 + perm[cell % 9] for cell in range(81)), perm + (9,))
+    for perm in SYMMETRIES
+)
+
+
+def _symmetries(state):
+    if isinstance(state, engine.UltimateState):
+        return ULTIMATE_SYMMETRIES
+    if isinstance(state, engine.ThreeMovesState):
+        return SYMMETRIES
+    return board_symmetries(state.width, state.height, isinstance(state, engine.TetrisState))
+
+
+def symmetric_keys(state):
+    # Zobrist key of the position under every symmetry of its board; the
+    # first one, of the identity, is state.key
+    side = SIDE if state.player == engine.O else 0
+    keys = []
+    if isinstance(state, engine.UltimateState):
+        x_cells = bit_indices(state.x_bits)
+        o_cells = bit_indices(state.o_bits)
+        active = state.active_index()
+        for perm, boards in ULTIMATE_SYMMETRIES:
+            key = side ^ ACTIVE[boards[active]]
+            for cell in x_cells:
+                key ^= ULTIMATE_CELLS[engine.X][perm[cell]]
+            for cell in o_cells:
+                key ^= ULTIMATE_CELLS[engine.O][perm[cell]]
+            keys.append(key)
+    elif isinstance(state, engine.ThreeMovesState):
+        for perm in SYMMETRIES:
+            keys.append(side ^ queue_key([perm[cell] for cell in state.x_list], engine.X)
+                        ^ queue_key([perm[cell] for cell in state.o_list], engine.O))
+    else:
+        x_cells = bit_indices(state.x_bits)
+        o_cells = bit_indices(state.o_bits)
+        for perm in _symmetries(state):
+            key = side
+            for cell in x_cells:
+                key ^= CELLS[engine.X][perm[cell]]
+            for cell in o_cells:
+                key ^= CELLS[engine.O][perm[cell]]
+            keys.append(key)
+    return keys
+
+
+def canonical_key(state):
+    return min(symmetric_keys(state))
+
+
+def play_keys(state, keys, move):
+    # Make the move and return the symmetric keys of the new position,
+    # updated with a few XORs per symmetry like state.key
+    player = state.player
+    if isinstance(state, engine.UltimateState):
+        before = state.active_index()
+        state.make_move(move)
+        after = state.active_index()
+        cells = ULTIMATE_CELLS[player]
+        return [key ^ cells[perm[move]] ^ ACTIVE[boards[before]] ^ ACTIVE[boards[after]] ^ SIDE
+                for key, (perm, boards) in zip(keys, ULTIMATE_SYMMETRIES)]
+    if isinstance(state, engine.ThreeMovesState):
+        # A move may also take the oldest mark off the board
+        state.make_move(move)
+        return symmetric_keys(state)
+    occupied = state.x_bits | state.o_bits
+    state.make_move(move)
+    cell = ((state.x_bits | state.o_bits) ^ occupied).bit_length() - 1
+    cells = CELLS[player]
+    return [key ^ cells[perm[cell]] ^ SIDE for key, perm in zip(keys, _symmetries(state))]
+
+
+def game_keys(mode, moves, depth=DEPTH):
+    # Canonical keys of the positions of a game, from the start up to depth plies
+    state = engine.new_game(mode)
+    keys = symmetric_keys(state)
+    yield min(keys)
+    for move in moves[:depth]:
+        if state.game_over:
+            return
+        keys = play_keys(state, keys, move)
+        yield min(keys)
+
+
+def build_index(paths, mode, depth=DEPTH):
+    # {canonical key: packed counts} of the mode's games in the record files.
+    # A position repeated within a game (in 3-Tac) counts once.
+    counts = {}
+    for path in paths:
+        for record in game_records.read_records(path):
+            if record.mode != mode:
+                continue
+            result = RESULT_COUNTS[record.result]
+            for key in set(game_keys(mode, record.moves, depth)):
+                counts[key] = counts.get(key, 0) + result
+    return counts
+
+
+def write_index(path, mode, counts, min_games=1):
+    # Write the positions seen in at least min_games games; returns their number
+    entries = [(key, value) for key, value in counts.items() if value >> 3 * COUNT_BITS >= min_games]
+    slots = 8
+    while slots * 2 < len(entries) * 3:  # Keep the table at most 2/3 full
+        slots *= 2
+    mask = slots - 1
+    data = bytearray(HEADER.size + slots * SLOT.size)
+    HEADER.pack_into(data, 0, MAGIC, VERSION, game_records.MODE_IDS[mode], slots, len(entries))
+    for key, value in entries:
+        slot = key & mask
+        while SLOT.unpack_from(data, HEADER.size + slot * SLOT.size)[4]:
+            slot = (slot + 1) & mask
+        SLOT.pack_into(data, HEADER.size + slot * SLOT.size, key, value & COUNT_MASK, value >> COUNT_BITS & COUNT_MASK,
+                       value >> 2 * COUNT_BITS & COUNT_MASK, value >> 3 * COUNT_BITS)
+
+    # Replace an older index only once the new one is complete
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return len(entries)
+
+
+class PositionIndex:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < HEADER.size:
+            self.close()
+            raise ValueError("Not a position index")
+        magic, version, mode, slots, self.positions = HEADER.unpack_from(self.data, 0)
+        # A lookup stops at an empty slot, so the table must have some
+        if (magic != MAGIC or version != VERSION or mode >= len(game_records.MODES)
+                or not slots or slots & (slots - 1) or self.positions >= slots
+                or len(self.data) != HEADER.size + slots * SLOT.size):
+            self.close()
+            raise ValueError("Not a position index")
+        self.mode = game_records.MODES[mode]
+        self.mask = slots - 1
+
+    def __len__(self):
+        return self.positions
+
+    def lookup(self, key):
+        # PositionStats of a canonical key, or None if it was never reached
+        # Never more probes than slots, even in a damaged file without empty ones
+        slot = key & self.mask
+        for _ in range(self.mask + 1):
+            stored, x_wins, draws, o_wins, games = SLOT.unpack_from(self.data, HEADER.size + slot * SLOT.size)
+            if not games:
+                return None
+            if stored == key:
+                return PositionStats(x_wins, draws, o_wins, games)
+            slot = (slot + 1) & self.mask
+        return None
+
+    def stats(self, state):
+        return self.lookup(canonical_key(state))
+
+    def close(self):
+        self.data.close()
+
+
+def load_index(mode, path=None):
+    # Memory-map the mode's index once; returns None if it was never built
+    if mode not in _indexes:
+        try:
+            _indexes[mode] = PositionIndex(path or index_path(mode))
+        except (OSError, ValueError):
+            return None
+    return _indexes[mode]
+
+
+def score(stats, player):
+    # Share of the games won by the player, draws counting half
+    wins = stats.x_wins if player == engine.X else stats.o_wins
+    return (wins + stats.draws / 2) / stats.games
+
+
+def book_move(state, index, min_games=MIN_GAMES):
+    # Move that scored best for the side to move in at least min_games
+    # games, or None if no move was played that often
+    player = state.player
+    best_moves = []
+    best_score = -1.0
+    for move in state.legal_moves():
+        state.make_move(move)
+        stats = index.stats(state)
+        state.unmake_move()
+        if stats is None or stats.games < min_games:
+            continue
+        move_score = score(stats, player)
+        if move_score > best_score:
+            best_moves = [move]
+            best_score = move_score
+        elif move_score == best_score:
+            best_moves.append(move)
+    return random.choice(best_moves) if best_moves else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m position_index", description="Index logged games by position.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build the index of a mode from record files")
+    build_parser.add_argument("mode", choices=game_records.MODES)
+    build_parser.add_argument("paths", nargs="*", metavar="FILE", help="record files (default: the player's game log)")
+    build_parser.add_argument("-o", "--output", help="index file (default: the player's index of the mode)")
+    build_parser.add_argument("--depth", type=int, default=DEPTH, help="plies indexed of every game")
+    build_parser.add_argument("--min-games", type=int, default=1, help="leave out positions reached in fewer games")
+    show_parser = commands.add_parser("show", help="show the results from a position and of every move from it")
+    show_parser.add_argument("mode", choices=game_records.MODES)
+    show_parser.add_argument("moves", nargs="*", type=int, help="moves leading to the position")
+    show_parser.add_argument("-i", "--index", help="index file (default: the player's index of the mode)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        output = args.output or index_path(args.mode)
+        start = time.perf_counter()
+        counts = build_index(args.paths or [game_records.log_path()], args.mode, args.depth)
+        count = write_index(output, args.mode, counts, args.min_games)
+        elapsed = time.perf_counter() - start
+        print(f"{output}: {count} positions, {os.path.getsize(output)} bytes, built in {elapsed:.2f}s")
+        return 0
+
+    index = PositionIndex(args.index or index_path(args.mode))
+    if index.mode != args.mode:
+        print(f"The index is of {index.mode}, not {args.mode}")
+        return 1
+    state = engine.new_game(args.mode)
+    for move in args.moves:
+        state.apply_move(move)
+
+    def describe(stats):
+        if stats is None:
+            return "never reached"
+        return f"{stats.games} games, X {stats.x_wins}, draws {stats.draws}, O {stats.o_wins}"
+
+    print(f"Position: {describe(index.stats(state))}")
+    if not state.game_over:
+        for move in state.legal_moves():
+            state.make_move(move)
+            stats = index.stats(state)
+            state.unmake_move()
+            if stats is not None:
+                print(f"  {move}: {describe(stats)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import collections
+import csv
+import json
+import time
+
+import pygame
+
+from text_cache import get_font
+
+# Opt-in frame profiler for the menu and game loops.
+#
+# A loop calls mark(phase) at the end of every phase of a frame, and the
+# time since the previous mark is added to that phase; the FrameScheduler
+# marks "present" and "tick" and closes the frame. Nothing is measured
+# until F3 turns the profiler on, which also shows an overlay with the FPS,
+# the average milliseconds of every phase and a histogram of recent frame
+# times. F4 saves the recorded frames as CSV and JSON traces.
+
+TOGGLE_KEY = pygame.K_F3
+EXPORT_KEY = pygame.K_F4
+
+HISTORY = 120        # Frames shown in the overlay histogram
+AVERAGE = 60         # Frames the overlay averages over
+MAX_TRACE = 36000    # Frames kept for export, 10 minutes at 60 FPS
+
+OVERLAY_RECT = pygame.Rect(370, 0, 230, 190)
+OVERLAY_FONT = 20
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.start_time = 0.0
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+        self.phases = {}
+        self.frame = 0
+        self.history = collections.deque(maxlen=HISTORY)
+        self.trace = collections.deque(maxlen=MAX_TRACE)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.start_time = self.frame_start = self.last_mark = time.perf_counter()
+            self.phases = {}
+            self.history.clear()
+            self.trace.clear()
+            self.frame = 0
+
+    def handle_event(self, event):
+        # True if the event changed what the overlay shows
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key == TOGGLE_KEY:
+            self.toggle()
+            return True
+        if event.key == EXPORT_KEY and self.trace:
+            self.export_all()
+        return False
+
+    def mark(self, phase):
+        # Add the time since the previous mark to the phase
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def end_frame(self, scene):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        record = {
+            "frame": self.frame,
+            "scene": scene,
+            "time_s": round(self.frame_start - self.start_time, 6),
+            "total_ms": round((now - self.frame_start) * 1000, 3),
+        }
+        for phase, ms in self.phases.items():
+            record[phase] = round(ms, 3)
+        self.trace.append(record)
+        self.history.append(record)
+        self.frame += 1
+        self.phases = {}
+        self.frame_start = self.last_mark = now
+
+    def draw(self, screen, fps_cap):
+        # Draw the overlay and return the screen area it covers
+        pygame.draw.rect(screen, (0, 0, 0), OVERLAY_RECT)
+        font = get_font(OVERLAY_FONT)
+        recent = list(self.history)[-AVERAGE:]
+        lines = []
+        if recent:
+            frame_ms = sum(record["total_ms"] for record in recent) / len(recent)
+            lines.append(f"FPS {1000 / frame_ms:.0f}  frame {frame_ms:.2f} ms" if frame_ms else "FPS -")
+            phases = {}
+            for record in recent:
+                for phase, ms in record.items():
+                    if phase not in ("frame", "scene", "time_s", "total_ms"):
+                        phases[phase] = phases.get(phase, 0.0) + ms
+            for phase, ms in phases.items():
+                lines.append(f"{phase:10} {ms / len(recent):7.2f} ms")
+        else:
+            lines.append("Profiling...")
+
+        # Text is rendered directly, numbers change every frame and would flood the text cache
+        y = OVERLAY_RECT.top + 4
+        for line in lines:
+            screen.blit(font.render(line, True, (255, 255, 255)), (OVERLAY_RECT.left + 6, y))
+            y += OVERLAY_FONT - 4
+
+        # Frame time histogram, the red line is the frame budget of the FPS cap
+        graph = pygame.Rect(OVERLAY_RECT.left + 5, OVERLAY_RECT.bottom - 45, OVERLAY_RECT.width - 10, 40)
+        budget = 1000 / fps_cap if fps_cap else 1000 / 60
+        scale = graph.height / (budget * 2)
+        bar_width = graph.width / HISTORY
+        for i, record in enumerate(self.history):
+            height = min(graph.height, max(1, round(record["total_ms"] * scale)))
+            color = (90, 200, 90) if record["total_ms"] <= budget * 1.05 else (230, 170, 40)
+            pygame.draw.rect(screen, color, (graph.left + round(i * bar_width), graph.bottom - height, max(1, round(bar_width)), height))
+        budget_y = graph.bottom - round(budget * scale)
+        pygame.draw.line(screen, (220, 60, 60), (graph.left, budget_y), (graph.right, budget_y))
+        return OVERLAY_RECT
+
+    def columns(self):
+        names = ["frame", "scene", "time_s", "total_ms"]
+        for record in self.trace:
+            for name in record:
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def export(self, path):
+        # Save the trace as CSV or JSON, chosen by the file extension
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=self.columns(), restval=0)
+                writer.writeheader()
+                writer.writerows(self.trace)
+        else:
+            with open(path, "w") as f:
+                json.dump({"columns": self.columns(), "frames": list(self.trace)}, f)
+
+    def export_all(self):
+        name = time.strftime("profile-%Y%m%d-%H%M%S")
+        for extension in (".csv", ".json"):
+            self.export(name + extension)
+        print(f"Profile saved: {name}.csv, {name}.json ({len(self.trace)} frames)")
+
+
+# Shared by every loop
+profiler = Profiler()
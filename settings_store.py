@@ -0,0 +1,169 @@
+import atexit
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Settings of the player, saved in their own config directory.
+#
+# The game may be installed where it cannot write, so src/settings.json only
+# ships the defaults and is never written. Settings are saved to
+# %APPDATA% on Windows, ~/Library/Application Support on macOS and
+# $XDG_CONFIG_HOME (~/.config) elsewhere; TICTACTOE_CONFIG_DIR overrides it.
+#
+# Saved files carry a schema version. Older files are migrated when loaded,
+# options they lack get their defaults and invalid values are replaced by
+# the defaults too.
+#
+# save() returns at once. A writer thread waits until the settings stopped
+# changing for DEBOUNCE_SECONDS, then writes them to a temporary file and
+# renames it over the old one, so an interrupted write never leaves a
+# broken file. Pending settings are written when the game exits.
+
+VERSION = 2
+DEBOUNCE_SECONDS = 0.5
+
+DEFAULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "settings.json")
+FILE_NAME = "settings.json"
+
+DEFAULTS = {
+    "game_volume": 0.5,
+    "music_volume": 0.5,
+    "theme": "Dark",
+    "bot_difficulty": "Easy",
+    "bot_think_ms": 500,
+    "bot_workers": 1,
+    "fps_cap": 60,
+}
+
+
+def _volume(value):
+    return isinstance(value, (int, float)) and 0 <= value <= 1
+
+
+# Check of every option; the theme is checked by the game against its themes
+VALID = {
+    "game_volume": _volume,
+    "music_volume": _volume,
+    "theme": lambda value: isinstance(value, str),
+    "bot_difficulty": lambda value: value in ("Easy", "Hard", "Perfect"),
+    "bot_think_ms": lambda value: isinstance(value, int) and value > 0,
+    "bot_workers": lambda value: isinstance(value, int) and value > 0,
+    "fps_cap": lambda value: isinstance(value, int) and value >= 0,
+}
+
+
+def _from_version_1(data):
+    # Version 1 files had no version field; the bot and FPS options were
+    # added to them one by one, so any of those may be missing
+    return data
+
+
+# Upgrade of a file of each older version to the next one
+MIGRATIONS = {
+    1: _from_version_1,
+}
+
+
+def config_dir():
+    override = os.environ.get("TICTACTOE_CONFIG_DIR")
+    if override:
+        return override
+    if sys.platform == "win32":
+        return os.path.join(os.environ.get("APPDATA") or os.path.expanduser("~"), "Tic-Tac-Toe Collection")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~/Library/Application Support"), "Tic-Tac-Toe Collection")
+    return os.path.join(os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"), "tic-tac-toe-collection")
+
+
+def migrate(data):
+    # Settings of any version, upgraded and checked against the current schema
+    version = data.get("version", 1)
+    while version in MIGRATIONS:
+        data = MIGRATIONS[version](data)
+        version += 1
+    settings = {}
+    for name, default in DEFAULTS.items():
+        value = data.get(name, default)
+        settings[name] = value if VALID[name](value) else default
+    return settings
+
+
+def write_atomic(path, data):
+    # Write JSON to a temporary file next to the target, then rename it over the target
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class SettingsStore:
+    def __init__(self, path=None, delay=DEBOUNCE_SECONDS):
+        self.path = path or os.path.join(config_dir(), FILE_NAME)
+        self.delay = delay
+        self.pending = None  # Settings waiting to be written
+        self.due = 0.0       # time.monotonic() when they are written
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.thread = None
+
+    def load(self):
+        # The saved settings, else the shipped defaults, else the built-in ones
+        for path in (self.path, DEFAULTS_PATH):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if isinstance(data, dict):
+                return migrate(data)
+        return dict(DEFAULTS)
+
+    def save(self, settings):
+        # Schedule a write of the settings; a newer save replaces a pending one
+        with self.condition:
+            self.pending = dict(settings, version=VERSION)
+            self.due = time.monotonic() + self.delay
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._writer, name="settings writer", daemon=True)
+                self.thread.start()
+                atexit.register(self.flush)
+            self.condition.notify()
+
+    def flush(self):
+        # Write pending settings now
+        with self.write_lock:
+            with self.condition:
+                settings, self.pending = self.pending, None
+            if settings is not None:
+                self._write(settings)
+
+    def _writer(self):
+        while True:
+            with self.condition:
+                while self.pending is None or time.monotonic() < self.due:
+                    self.condition.wait(None if self.pending is None else self.due - time.monotonic())
+            self.flush()
+
+    def _write(self, settings):
+        try:
+            write_atomic(self.path, settings)
+        except OSError as error:
+            print(f"Settings not saved: {error}")
+
+
+# Shared by the game
+store = SettingsStore()
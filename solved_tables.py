@@ -0,0 +1,79 @@
+import random
+import struct
+import zlib
+
+# Shared format of the tables of solved modes (3-Tac and Tetris-like).
+#
+# A table holds one byte per position index:
+#   0     - position not reachable
+#   1     - draw
+#   2 + d - the game ends d moves from here with best play; the side to
+#           move wins if d is odd and loses if d is even
+# Files are a header (magic, version, number of reachable positions)
+# followed by the zlib-compressed table.
+
+HEADER = struct.Struct("<4sHI")
+VERSION = 1
+
+WIN, DRAW, LOSS = 1, 0, -1
+
+
+def encode(result, distance):
+    return 1 if result == DRAW else distance + 2
+
+
+def decode(entry):
+    # (result, distance) for the side to move
+    if entry == 0:
+        raise ValueError("Position is not reachable")
+    if entry == 1:
+        return DRAW, 0
+    distance = entry - 2
+    return (WIN if distance % 2 else LOSS), distance
+
+
+def rank(value):
+    # Sort key of a (result, distance): the fastest win, else a draw, else the slowest loss
+    result, distance = value
+    return result, -distance if result == WIN else distance if result == LOSS else 0
+
+
+def write_table(path, magic, table):
+    reachable = sum(1 for entry in table if entry)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(magic, VERSION, reachable))
+        f.write(zlib.compress(bytes(table), 9))
+    return reachable
+
+
+def read_table(path, magic, size):
+    # The table stored in the file, or None if it is missing or does not match
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        file_magic, version, _ = HEADER.unpack_from(data, 0)
+        table = zlib.decompress(data[HEADER.size:])
+    except (OSError, struct.error, zlib.error):
+        return None
+    if file_magic != magic or version != VERSION or len(table) != size:
+        return None
+    return table
+
+
+def move_values(state, lookup):
+    # (result, distance) of every legal move for the side to move
+    values = {}
+    for move in state.legal_moves():
+        state.make_move(move)
+        result, distance = lookup(state)
+        state.unmake_move()
+        # A draw has no distance, as in decode()
+        values[move] = (-result, 0 if result == DRAW else distance + 1)
+    return values
+
+
+def best_move(state, lookup):
+    # Random move among the best ones
+    ranks = {move: rank(value) for move, value in move_values(state, lookup).items()}
+    best = max(ranks.values())
+    return random.choice([move for move, value in ranks.items() if value == best])
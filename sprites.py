@@ -0,0 +1,56 @@
+import pygame
+
+# Pre-rendered board backgrounds and X/O glyphs.
+#
+# Every surface is drawn once with pygame.draw and then only blitted. The
+# cache holds colors of the current theme, so changing the theme clears it;
+# returning to the menu keeps it.
+
+_cache = {}
+
+
+def cached(key, build):
+    # Surface stored under key, built by build() on first use
+    surface = _cache.get(key)
+    if surface is None:
+        surface = build()
+        _cache[key] = surface
+    return surface
+
+
+def clear():
+    _cache.clear()
+
+
+def _color_key(color):
+    return tuple(color) if isinstance(color, list) else color
+
+
+def x_sprite(size, color, start, end, width):
+    # X inside a size x size cell, strokes from (start, start) to (end, end)
+    def build():
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.line(surface, color, (start, start), (end, end), width)
+        pygame.draw.line(surface, color, (start, end), (end, start), width)
+        return surface.convert_alpha()
+    return cached(("x", size, _color_key(color), start, end, width), build)
+
+
+def o_sprite(size, color, radius, width):
+    # O centered in a size x size cell
+    def build():
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(surface, color, (size // 2, size // 2), radius, width)
+        return surface.convert_alpha()
+    return cached(("o", size, _color_key(color), radius, width), build)
+
+
+def blit_scaled(target, image, pos, scale):
+    # Blit a cell sprite scaled around its center, for marks being placed.
+    # Scaled copies change every frame and are not cached.
+    if scale >= 1:
+        target.blit(image, pos)
+        return
+    width, height = image.get_size()
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    target.blit(pygame.transform.smoothscale(image, size), (pos[0] + (width - size[0]) // 2, pos[1] + (height - size[1]) // 2))
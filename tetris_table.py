@@ -0,0 +1,67 @@
+import os
+
+import engine
+import solved_tables
+from bitboard import TERNARY
+
+# Exact results of every reachable Tetris-like position.
+#
+# With gravity at most 3 moves are legal and a game lasts at most 9 moves,
+# so solve() simply searches the whole game tree once, storing every
+# position it meets so each is solved only once. Positions are indexed by
+# their cells in base 3 (the side to move follows from the number of
+# marks). The entries are described in solved_tables.py; the table is
+# built by build_tables.py, or solved on first use if the file is missing.
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "tetris_table.bin")
+MAGIC = b"TTTG"
+SIZE = 3 ** 9
+
+_table = None
+
+
+def position_index(state):
+    # Base-3 digit per cell: 0 empty, 1 X, 2 O
+    return TERNARY[state.x_bits] + 2 * TERNARY[state.o_bits]
+
+
+def solve():
+    # Table entries of every reachable position, as a bytearray of SIZE
+    table = bytearray(SIZE)
+    state = engine.TetrisState()
+
+    def search(position):
+        # (result, distance) of the position, solving the positions after it first
+        index = position_index(position)
+        if not table[index]:
+            if position.game_over:
+                result = solved_tables.DRAW if position.winner == engine.TIE else solved_tables.LOSS
+                table[index] = solved_tables.encode(result, 0)
+            else:
+                values = solved_tables.move_values(position, search)
+                table[index] = solved_tables.encode(*max(values.values(), key=solved_tables.rank))
+        return solved_tables.decode(table[index])
+
+    search(state)
+    return table
+
+
+def load_table(path=TABLE_PATH):
+    global _table
+    if _table is None:
+        _table = solved_tables.read_table(path, MAGIC, SIZE) or solve()
+    return _table
+
+
+def lookup(state):
+    # (result, distance) of the position for the side to move
+    return solved_tables.decode(load_table()[position_index(state)])
+
+
+def column_values(state):
+    # (result, distance) of dropping a mark into each open column, for the side to move
+    return solved_tables.move_values(state, lookup)
+
+
+def best_move(state):
+    return solved_tables.best_move(state, lookup)
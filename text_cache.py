@@ -0,0 +1,34 @@
+import functools
+
+import pygame
+
+# Process-wide font registry and cache of rendered text surfaces.
+#
+# Fonts are created once per (size, bold, italic) and text surfaces are
+# kept in an LRU cache keyed by (text, font, color), so static labels are
+# rasterized once instead of every frame.
+
+_fonts = {}
+
+
+def get_font(size, bold=False, italic=False):
+    key = (size, bold, italic)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(None, size)
+        font.set_bold(bold)
+        font.set_italic(italic)
+        _fonts[key] = font
+    return font
+
+
+@functools.lru_cache(maxsize=256)
+def _render(text, font_key, color):
+    return get_font(*font_key).render(text, True, color)
+
+
+def render_text(text, color, size, bold=False, italic=False):
+    # Theme colors come from JSON as lists, which can't be cache keys
+    if isinstance(color, list):
+        color = tuple(color)
+    return _render(text, (size, bold, italic), color)
@@ -0,0 +1,41 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Runs bots on a background thread so the game loop keeps drawing and
+# handling input while a bot thinks.
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bot")
+
+
+class BotThinker:
+    def __init__(self):
+        self.bot = None
+        self.future = None
+        self.ready_time = 0
+
+    @property
+    def thinking(self):
+        return self.future is not None
+
+    def start(self, bot, state, delay_ms=0):
+        # Think on a copy of the state; the move is handed out no earlier than delay_ms
+        self.cancel()
+        self.bot = bot
+        self.future = _executor.submit(bot, state.copy())
+        self.ready_time = time.perf_counter() + delay_ms / 1000
+
+    def poll(self):
+        # The bot's move once it is ready, otherwise None
+        if self.future is None or not self.future.done() or time.perf_counter() < self.ready_time:
+            return None
+        future = self.future
+        self.future = None
+        return future.result()
+
+    def cancel(self):
+        # Drop the pending move; searches that support it stop early
+        if self.future is None:
+            return
+        if not self.future.cancel() and hasattr(self.bot, "stop"):
+            self.bot.stop()
+        self.future = None
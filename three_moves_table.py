@@ -0,0 +1,109 @@
+import collections
+import itertools
+import os
+
+import engine
+import solved_tables
+
+# Exact results of every reachable 3-Tac position, by retrograde analysis.
+#
+# Marks expire, so 3-Tac games can go round in circles and a minimax
+# search never bottoms out. Instead, solve() enumerates every reachable
+# position (at most 3 marks per side, in the order they were placed, and
+# the side to move) and works backwards from the finished games: a position
+# is won if some move leads to a lost one, and lost once every move leads
+# to a won one. Positions never decided this way are draws, neither side
+# can force the game to end.
+#
+# A position's index is computed from the two move queues, so a lookup is
+# a single read. The entries are described in solved_tables.py; the table
+# is built once by build_tables.py.
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "three_moves_table.bin")
+MAGIC = b"TTT3"
+
+# Every move queue of at most 3 distinct cells, oldest mark first
+QUEUES = [queue for length in range(4) for queue in itertools.permutations(range(9), length)]
+QUEUE_INDEX = {queue: i for i, queue in enumerate(QUEUES)}
+SIZE = len(QUEUES) * len(QUEUES) * 2
+
+_table = None
+
+
+def position_index(state):
+    side = 1 if state.player == engine.O else 0
+    return (QUEUE_INDEX[tuple(state.x_list)] * len(QUEUES) + QUEUE_INDEX[tuple(state.o_list)]) * 2 + side
+
+
+def solve():
+    # Table entries of every reachable position, as a bytearray of SIZE
+    start = engine.ThreeMovesState()
+    parents = {position_index(start): []}
+    moves_left = {}
+    finished = []
+    pending = [start]
+    while pending:
+        state = pending.pop()
+        index = position_index(state)
+        if state.game_over:
+            finished.append(index)
+            continue
+        moves = state.legal_moves()
+        moves_left[index] = len(moves)
+        for move in moves:
+            state.make_move(move)
+            child = position_index(state)
+            if child not in parents:
+                parents[child] = []
+                pending.append(state.copy())
+            parents[child].append(index)
+            state.unmake_move()
+
+    # Finished games are lost for the side to move. Positions are settled in
+    # order of distance, so a won position gets its fastest win and a lost
+    # one its slowest loss.
+    distance = dict.fromkeys(finished, 0)
+    queue = collections.deque(finished)
+    while queue:
+        index = queue.popleft()
+        d = distance[index]
+        for parent in parents[index]:
+            if parent in distance:
+                continue
+            if d % 2 == 0:
+                distance[parent] = d + 1
+                queue.append(parent)
+            else:
+                moves_left[parent] -= 1
+                if not moves_left[parent]:
+                    distance[parent] = d + 1
+                    queue.append(parent)
+
+    table = bytearray(SIZE)
+    for index in parents:
+        if index in distance:
+            table[index] = solved_tables.encode(solved_tables.WIN if distance[index] % 2 else solved_tables.LOSS, distance[index])
+        else:
+            table[index] = solved_tables.encode(solved_tables.DRAW, 0)
+    return table
+
+
+def load_table(path=TABLE_PATH):
+    # Load the table once; if it was never built, solve it in memory (a few seconds)
+    global _table
+    if _table is None:
+        _table = solved_tables.read_table(path, MAGIC, SIZE) or solve()
+    return _table
+
+
+def lookup(state):
+    # (result, distance) of the position for the side to move
+    return solved_tables.decode(load_table()[position_index(state)])
+
+
+def move_values(state):
+    return solved_tables.move_values(state, lookup)
+
+
+def best_move(state):
+    return solved_tables.best_move(state, lookup)
@@ -0,0 +1,122 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import bots
+import engine
+import game_records
+
+# Headless bot-vs-bot tournaments, no display or pygame needed:
+#
+#   python -m tournament classic --first Perfect --second Easy --games 100000
+#   python -m tournament ultimate --games 10000 --record selfplay.ttr --compression zlib
+#
+# The first bot plays X in even games and O in odd ones. Games are split
+# into chunks that run in worker processes, and the first bot's wins,
+# draws and losses are summed over all chunks. With --record, every game
+# is also appended to a game record file (see game_records.py).
+
+DEFAULT_MAX_MOVES = 200  # 3-Tac has no draws, so games between equal bots may never end
+
+
+def play_game(mode, x_bot, o_bot, max_moves=DEFAULT_MAX_MOVES):
+    # The state at the end of one game; games cut off at max_moves are left unfinished
+    state = engine.new_game(mode)
+    players = {engine.X: x_bot, engine.O: o_bot}
+    for _ in range(max_moves):
+        if state.game_over:
+            break
+        state.apply_move(players[state.player](state))
+    return state
+
+
+def play_chunk(mode, first, second, think_ms, start, games, seed=None, max_moves=DEFAULT_MAX_MOVES, record=False):
+    # Worker entry point: play games start..start+games-1, return the first
+    # bot's [wins, draws, losses] and, if recording, the encoded games
+    # Forked workers inherit the parent's random state, so every chunk reseeds
+    random.seed(None if seed is None else seed + start)
+    first_bot = bots.get_bot(mode, first, think_ms)
+    second_bot = bots.get_bot(mode, second, think_ms)
+    results = [0, 0, 0]
+    records = bytearray()
+    for game in range(start, start + games):
+        first_side = engine.X if game % 2 == 0 else engine.O
+        if first_side == engine.X:
+            state = play_game(mode, first_bot, second_bot, max_moves)
+        else:
+            state = play_game(mode, second_bot, first_bot, max_moves)
+        if record:
+            records += game_records.encode_record(mode, game_records.played_moves(state), state.winner)
+        # A game cut off counts as a draw
+        winner = state.winner or engine.TIE
+        if winner == engine.TIE:
+            results[1] += 1
+        elif winner == first_side:
+            results[0] += 1
+        else:
+            results[2] += 1
+    return results, bytes(records)
+
+
+def run_tournament(mode, first, second, games, workers=1, think_ms=100, seed=None, max_moves=DEFAULT_MAX_MOVES,
+                   record=None, compression="none"):
+    # The first bot's [wins, draws, losses] over all games; with record set,
+    # the games are appended to that record file
+    writer = game_records.RecordWriter(record, compression) if record else None
+    results = [0, 0, 0]
+
+    def add(chunk_results, records):
+        for i, count in enumerate(chunk_results):
+            results[i] += count
+        if writer:
+            writer.write_encoded(records)
+
+    try:
+        if workers <= 1:
+            add(*play_chunk(mode, first, second, think_ms, 0, games, seed, max_moves, bool(writer)))
+            return results
+
+        # A few chunks per worker keep every core busy until the end
+        chunk = max(1, min(10000, games // (workers * 8)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_chunk, mode, first, second, think_ms, start,
+                                       min(chunk, games - start), seed, max_moves, bool(writer))
+                       for start in range(0, games, chunk)]
+            for future in as_completed(futures):
+                add(*future.result())
+        return results
+    finally:
+        if writer:
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tournament", description="Play bots against each other without a display.")
+    parser.add_argument("mode", choices=list(engine.MODES))
+    parser.add_argument("--first", choices=bots.DIFFICULTIES, default="Easy", help="difficulty of the first bot")
+    parser.add_argument("--second", choices=bots.DIFFICULTIES, default="Easy", help="difficulty of the second bot")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: all cores)")
+    parser.add_argument("--think-ms", type=int, default=100, help="time per move of search bots")
+    parser.add_argument("--max-moves", type=int, default=DEFAULT_MAX_MOVES, help="moves before a game counts as a draw")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--record", metavar="FILE", help="append every game to this game record file")
+    parser.add_argument("--compression", choices=list(game_records.COMPRESSIONS), default="none",
+                        help="block compression of a new record file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    wins, draws, losses = run_tournament(args.mode, args.first, args.second, args.games, args.workers,
+                                         args.think_ms, args.seed, args.max_moves, args.record, args.compression)
+    elapsed = time.perf_counter() - start
+
+    total = wins + draws + losses
+    print(f"{args.mode}: {args.first} vs {args.second}, {total} games in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} games/s, {args.workers} workers)")
+    print(f"{args.first}: {wins / total:.1%} wins, {draws / total:.1%} draws, {losses / total:.1%} losses")
+
+
+if __name__ == "__main__":
+    main()
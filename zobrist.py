@@ -0,0 +1,46 @@
+import random
+
+# Zobrist keys for the positions of every mode.
+#
+# A position's key is the XOR of one random 64-bit number per feature of
+# the position, so a move updates it with a few XORs and unmaking the move
+# applies the same XORs again. The numbers come from a fixed seed: the same
+# position has the same key in every process and every run, so keys can be
+# stored in logs and shared between worker processes.
+#
+# Tables indexed by marker have X (1) at index 1 and O (-1) at index -1,
+# the last entry.
+
+_rng = random.Random(0x5EED)
+
+
+def _keys(count):
+    return tuple(_rng.getrandbits(64) for _ in range(count))
+
+
+# Side to move: included while O is to move
+SIDE = _rng.getrandbits(64)
+
+# Largest board of the modes with a configurable size, 20x20 cells
+MAX_CELLS = 400
+
+# Classic and Tetris, any board up to MAX_CELLS: [marker][cell]
+CELLS = (None, _keys(MAX_CELLS), _keys(MAX_CELLS))
+
+# 3-Tac: [marker][age][cell], age 0 is the mark that expires first
+AGES = (None, (_keys(9), _keys(9), _keys(9)), (_keys(9), _keys(9), _keys(9)))
+
+# Ultimate: [marker][move], and the board the side to move has to play on,
+# with index 9 for a free choice
+ULTIMATE_CELLS = (None, _keys(81), _keys(81))
+ACTIVE = _keys(10)
+
+
+def queue_key(moves, marker):
+    # Key of a 3-Tac move queue, at most 3 marks
+    ages = AGES[marker]
+    key = 0
+    for age, cell in enumerate(moves):
+        key ^= ages[age][cell]
+    return key
+